@@ -1,6 +1,6 @@
-from random import (randint, uniform)
+from random import randint
 from PyQt6.QtCore import QTimer, Qt, QPointF
-from PyQt6.QtGui import QPainter, QBrush, QColor, QPainterPath
+from PyQt6.QtGui import QPainter, QBrush, QColor, QPainterPath, QFont
 from PyQt6.QtWidgets import (QApplication,
                              QWidget,
                              QLabel,
@@ -14,83 +14,16 @@ from PyQt6.QtWidgets import (QApplication,
                              QFormLayout,
                              QLineEdit
                              )
+import argparse
+import random
 import sys
+import time
 
-
-class Cabbage(object):
-    def __init__(self, value=None, x_coord=None, y_coord=None):
-        self.value = value if value else randint(200, 500)
-        self.radius = self.change_radius()
-        self.x_coord = x_coord if x_coord else randint(150, 500)
-        self.y_coord = y_coord if y_coord else randint(150, 500)
-        self.eaten_status = False
-
-    def change_radius(self):
-        return self.value ** 0.4
-
-    @property
-    def get_x_coord(self):
-        return self.x_coord
-
-    @property
-    def get_y_coord(self):
-        return self.y_coord
-
-    @property
-    def get_radius(self):
-        return self.radius
-
-
-class Goat(object):
-    def __init__(self, speed=None, endurance=None, x_coord=None, y_coord=None):
-        self.x_coord = x_coord if x_coord else randint(100, 500)
-        self.y_coord = y_coord if y_coord else randint(100, 500)
-        self.starve = 800
-        self.speed = speed / 10 if speed else uniform(0.5, 0.8)
-        self.eat_speed = self.change_eat_speed()
-        self.endurance = endurance / 10 if endurance else randint(2, 4)
-        self.radius = self.change_radius()
-        self.eating_status = False
-
-    def change_radius(self):
-        return self.starve ** 0.35
-
-    def change_eat_speed(self):
-        if self.starve > 700:
-            return 10
-        return (800 - self.starve) // 10
-
-    def animate_circles(self):
-        self.radius = self.change_radius()
-        self.eat_speed = self.change_eat_speed()
-
-    @property
-    def get_x_coord(self):
-        return self.x_coord
-
-    @property
-    def get_y_coord(self):
-        return self.y_coord
-
-    @property
-    def get_radius(self):
-        return self.radius
-
-    @property
-    def get_speed(self):
-        return self.speed
-
-    @property
-    def get_starve(self):
-        return self.starve
-
-    @property
-    def get_endurance(self):
-        return self.endurance
-
-
-def get_closest(x1, x2, y1, y2):
-    return ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
+from pen_model import Pen, get_closest
+from pen_log import PenRecorder, PenReplay
+from pen_profiler import PhaseProfiler
+from pen_snapshot import load_pen, save_pen
+from pen_live import PenPublisher
 
 
 def show_popup():
@@ -106,7 +39,7 @@ def show_popup():
 
 
 class Graphical_view(QWidget):
-    def __init__(self):
+    def __init__(self, model=None, trace_path=None, publisher=None, publish_every=1):
         super().__init__()
         self.setWindowTitle('Goats pen')
         self.setGeometry(50, 50, 750, 750)
@@ -114,12 +47,22 @@ class Graphical_view(QWidget):
         self.center_x = self.width() // 2
         self.center_y = self.height() // 2
 
-        self.cabbages = [Cabbage() for _ in range(7)]
-        self.pen = [Goat() for _ in range(1)]
+        self.model = model if model else Pen(cabbages=7, goats=2)
+        self.cabbages = self.model.cabbages
+        self.pen = self.model.pen
         self.clicked_coords = []
 
-        initial_goat_herd = [Goat()]
-        self.pen.extend(initial_goat_herd)
+        # Профилирование по фазам: P - показать/скрыть замеры, E - сохранить трассу, S - снимок загона.
+        # Замеры идут только с --trace или при открытых замерах; без --trace хранятся последние строки трассы
+        self.profiler = PhaseProfiler(max_rows=None if trace_path else 1000)
+        self.trace_path = trace_path or "pen_trace.csv"
+        self.snapshot_path = "pen_snapshot.pensnap"
+        self.tracing = trace_path is not None
+        self.show_profile = False
+        self.update_profiling()
+        # Живой просмотр из другого процесса (pen_live.py watch): публикация раз в publish_every тиков
+        self.publisher = publisher
+        self.publish_every = publish_every
         # ----------------------------------
         layout = QVBoxLayout()
         layout.addStretch()
@@ -173,21 +116,21 @@ class Graphical_view(QWidget):
         value = self.cabbage_value_input.value()
         x_coord = randint(150, 500)
         y_coord = randint(150, 500)
-        new_cabbage = Cabbage(value=value, x_coord=x_coord, y_coord=y_coord)
-        self.cabbages.append(new_cabbage)
+        self.model.spawn_cabbage(value, x_coord, y_coord)
 
     def add_goat_herd(self):
         speed = float(self.goat_speed_input.value())
         endurance = int(self.goat_endurance_input.value())
 
-        new_goat = Goat(speed=speed, endurance=endurance)
-        self.pen.append(new_goat)
+        x_coord = randint(100, 500)
+        y_coord = randint(100, 500)
+        self.model.spawn_goat(speed, endurance, x_coord, y_coord)
 
     def add_cabbage(self):
-        new_cabbage = Cabbage()
-        self.cabbages.append(new_cabbage)
+        self.model.add_cabbage()
 
     def paintEvent(self, event):
+        started = time.perf_counter()
         painter = QPainter(self)
 
         painter.setBrush(QBrush(Qt.GlobalColor.green, Qt.BrushStyle.SolidPattern))
@@ -226,10 +169,32 @@ class Graphical_view(QWidget):
                 painter.fillPath(path, painter.brush())
                 painter.drawPath(path)
 
+        if self.show_profile:
+            painter.setPen(Qt.GlobalColor.black)
+            painter.setFont(QFont("Monospace", 9))
+            for row, line in enumerate(self.profiler.summary_lines()):
+                painter.drawText(10, 20 + row * 14, line)
+        painter.end()
+        if self.model.profiler is not None:
+            self.profiler.add("render", time.perf_counter() - started)
+
+    def update_profiling(self):
+        self.model.profiler = self.profiler if self.tracing or self.show_profile else None
+
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_Escape:
             print("App closed")
             QApplication.quit()
+        elif event.key() == Qt.Key.Key_P:
+            self.show_profile = not self.show_profile
+            self.update_profiling()
+            self.update()
+        elif event.key() == Qt.Key.Key_E:
+            self.profiler.export(self.trace_path)
+            print("Trace saved to", self.trace_path)
+        elif event.key() == Qt.Key.Key_S:
+            save_pen(self.snapshot_path, self.model)
+            print("Snapshot saved to", self.snapshot_path)
 
     def mousePressEvent(self, event):
         x_coord = event.position().x()
@@ -255,9 +220,12 @@ class Graphical_view(QWidget):
         layout.addRow("Endurance: ", endurance_input)
 
         def confirmation():
-            closest_goat.speed = float(speed_input.text())
-            closest_goat.starve = int(starve_input.text())
-            closest_goat.endurance = float(endurance_input.text())
+            # Пока открыт диалог, таймер продолжает шаги, и коза могла умереть от голода
+            if closest_goat not in self.pen:
+                dialog.reject()
+                return
+            self.model.edit_goat(self.pen.index(closest_goat), float(speed_input.text()),
+                                 int(starve_input.text()), float(endurance_input.text()))
             dialog.accept()
             self.update()
 
@@ -270,66 +238,67 @@ class Graphical_view(QWidget):
         dialog.exec()
 
     def simulation_update(self):
-        for goat in self.pen:
-            closest_cabbage = min(self.cabbages,
-                                  key=lambda cabbage: get_closest(goat.get_x_coord, cabbage.get_x_coord,
-                                                                  goat.get_y_coord, cabbage.get_y_coord))
-            distance = get_closest(goat.get_x_coord, closest_cabbage.get_x_coord, goat.get_y_coord,
-                                   closest_cabbage.get_y_coord)
-            if distance != 0:
-
-                direction_x = closest_cabbage.get_x_coord - goat.get_x_coord
-                direction_y = closest_cabbage.get_y_coord - goat.get_y_coord
-
-                direction_x /= distance
-                direction_y /= distance
-
-                if distance <= goat.get_radius / 5:
-                    goat.x_coord = closest_cabbage.get_x_coord
-                    goat.y_coord = closest_cabbage.get_y_coord
-                    goat.eating_status = True
-
-                else:
-                    goat.eating_status = False
-                    goat.x_coord += direction_x * goat.get_speed
-                    goat.y_coord += direction_y * goat.get_speed
-
-                goat.starve -= goat.endurance
-                goat.animate_circles()
-
-            else:
-                if closest_cabbage.value > goat.eat_speed:
-                    closest_cabbage.eaten_status = True
-                    closest_cabbage.value -= goat.eat_speed
-                    closest_cabbage.radius = closest_cabbage.change_radius()
-                    goat.starve += goat.eat_speed
-                    goat.animate_circles()
-
-                else:
-                    closest_cabbage.eaten_status = True
-                    goat.starve += closest_cabbage.value
-                    goat.animate_circles()
-                    closest_cabbage.value = 0
-                    self.cabbages.remove(closest_cabbage)
-                    self.add_cabbage()
-
-            if goat.starve <= 0:
-                self.pen.remove(goat)  # решение к ошибке при выходе из анимации
-                if len(self.pen) == 0:
-                    show_popup()
-                    print('App closed')
-                    sys.exit(app.exec())
-                    # QTimer.singleShot(3000, QApplication.instance().quit)
-                else:
-                    continue
-
-            info_text = f"Cabbages: {len(self.cabbages)}, Goat Starvation: {goat.starve}, Cabbage Value: {closest_cabbage.value}, " \
-                        f"Goat Radius: {round(goat.radius, 2)}, Goat eat speed: {goat.eat_speed}"
-            self.info_label.setText(info_text)
+        # Строка трассы закрывается здесь, чтобы в неё попала отрисовка предыдущего тика
+        if self.model.tick and self.model.profiler is not None:
+            self.profiler.end_tick(self.model.tick, len(self.pen), len(self.cabbages))
+        self.model.step()
+        if self.publisher and self.model.tick % self.publish_every == 0:
+            self.publisher.publish_pen(self.model)
+        if len(self.pen) == 0:
+            show_popup()
+            print('App closed')
+            sys.exit(app.exec())
+            # QTimer.singleShot(3000, QApplication.instance().quit)
+        self.info_label.setText(self.model.info_text())
         self.update()
 
 
-app = QApplication(sys.argv)
-window = Graphical_view()
+# Окно двигает коз объектами Goat, больше этого числа оно не тянет
+GUI_MAX_GOATS = 20000
+
+parser = argparse.ArgumentParser(description="Goats pen")
+parser.add_argument("--seed", type=int, default=None)
+parser.add_argument("--record", default=None, help="write an event log of the session to this file")
+parser.add_argument("--replay", default=None, help="start from a recorded session")
+parser.add_argument("--tick", type=int, default=0, help="tick of the recorded session to start from")
+parser.add_argument("--load", default=None,
+                    help=f"start from a snapshot saved with S or pen_snapshot.py, at most {GUI_MAX_GOATS} goats "
+                         f"(the window builds one object per goat; pen_herd.py --load maps large ones without copying)")
+parser.add_argument("--trace", default=None, help="per-tick timing trace (.csv or .json), saved on exit and by E")
+parser.add_argument("--live", default=None, help="publish the pen to this shared memory name for pen_live.py watch")
+parser.add_argument("--live-every", type=int, default=1, help="publish every N ticks")
+parser.add_argument("--live-capacity", type=int, default=None,
+                    help="goats and cabbages the live segment holds (default: 4x the starting pen, "
+                         "at least 4096 goats and 1024 cabbages)")
+args, qt_args = parser.parse_known_args()
+
+app = QApplication(sys.argv[:1] + qt_args)
+seed = args.seed if args.seed is not None else time.time_ns() % 2 ** 32
+if args.load:
+    try:
+        model = load_pen(args.load, random.Random(seed), GUI_MAX_GOATS)
+    except ValueError as error:
+        parser.error(str(error))
+elif args.replay:
+    replay = PenReplay(args.replay)
+    seed = replay.seed
+    model = replay.seek(args.tick)
+    replay.close()
+else:
+    model = Pen(cabbages=7, goats=2, rng=random.Random(seed))
+if args.record:
+    # Запись начинается со снимка текущего загона, поэтому её можно вести и после --load или --replay
+    model.recorder = PenRecorder(args.record, seed)
+    model.recorder.record_snapshot(model)
+    app.aboutToQuit.connect(model.recorder.close)
+publisher = None
+if args.live:
+    # Козы и капуста добавляются кнопками, поэтому сегмент берётся с запасом от начального загона
+    publisher = PenPublisher(args.live, args.live_capacity or max(4096, 4 * len(model.pen)),
+                             args.live_capacity or max(1024, 4 * len(model.cabbages)))
+    app.aboutToQuit.connect(publisher.close)
+window = Graphical_view(model, args.trace, publisher, args.live_every)
+if args.trace:
+    app.aboutToQuit.connect(lambda: window.profiler.export(args.trace))
 window.show()
 sys.exit(app.exec())
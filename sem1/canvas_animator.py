@@ -0,0 +1,92 @@
+import argparse
+import time
+
+import numpy as np
+
+from trajectory import TrajectoryBank, MarkerSet, FixedStepScheduler, circle, ellipse, lissajous, rose
+
+
+# Анимация многих точек на одном Canvas: положения всех точек считаются одним проходом NumPy,
+# а все изменившиеся координаты уходят в Tcl одним скриптом за кадр вместо canvas.coords на каждую точку
+class CanvasAnimator(object):
+    def __init__(self, markers, canvas=None, size=5, fill='black'):
+        self.markers = markers
+        self.canvas = canvas
+        self.size = size
+        self.last_x = np.full(len(markers), np.iinfo(np.int64).min)
+        self.last_y = np.full(len(markers), np.iinfo(np.int64).min)
+        self.items = None
+        self.updated = 0
+        if canvas is not None:
+            x, y = self.pixels()
+            self.items = np.array([canvas.create_oval(item_x - size, item_y - size, item_x + size, item_y + size,
+                                                      fill=fill, outline='')
+                                   for item_x, item_y in zip(x.tolist(), y.tolist())])
+            self.last_x, self.last_y = x, y
+
+    def pixels(self, ahead=0.0):
+        x, y = self.markers.positions(ahead)
+        return np.rint(x).astype(np.int64), np.rint(y).astype(np.int64)
+
+    def frame(self, ahead=0.0):
+        x, y = self.pixels(ahead)
+        changed = np.flatnonzero((x != self.last_x) | (y != self.last_y))
+        self.last_x, self.last_y = x, y
+        self.updated = changed.size
+        return x, y, changed
+
+    def render(self, ahead=0.0):
+        x, y, changed = self.frame(ahead)
+        if self.canvas is None or changed.size == 0:
+            return
+        path, size = str(self.canvas), self.size
+        script = "\n".join(f"{path} coords {item} {item_x - size} {item_y - size} {item_x + size} {item_y + size}"
+                           for item, item_x, item_y in zip(self.items[changed].tolist(), x[changed].tolist(),
+                                                           y[changed].tolist()))
+        self.canvas.tk.eval(script)
+
+    # Без окна: кадры для тестов и замеров, с тем же расчётом положений и пропуском неизменившихся точек
+    def frames(self, count, step):
+        for _ in range(count):
+            self.markers.advance(step)
+            yield self.frame()
+
+
+def demo_markers(count, seed=0, length=600):
+    center = length / 2
+    curves = [circle(center, center, 100), circle(center, center, 200), ellipse(center, center, 250, 120),
+              lissajous(center, center, 220, 220), rose(center, center, 250, 4)]
+    rng = np.random.default_rng(seed)
+    bank = TrajectoryBank(curves, samples=720)
+    return MarkerSet(bank, rng.integers(0, len(curves), count), rng.uniform(-0.3, 0.3, count), rng.random(count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Many markers on one Tk canvas")
+    parser.add_argument("--markers", type=int, default=2000)
+    parser.add_argument("--headless", action="store_true", help="generate frames without a window")
+    parser.add_argument("--frames", type=int, default=1000)
+    args = parser.parse_args()
+
+    markers = demo_markers(args.markers)
+    if args.headless:
+        animator = CanvasAnimator(markers)
+        start = time.perf_counter()
+        updated = sum(changed.size for _, _, changed in animator.frames(args.frames, 1 / 60))
+        elapsed = time.perf_counter() - start
+        print(f"{args.frames} frames in {elapsed:.2f} s ({elapsed / args.frames * 1000:.2f} ms/frame), "
+              f"{updated / args.frames:.0f} items updated per frame")
+        return
+
+    from tkinter import Tk, Canvas
+    root = Tk()
+    root.title('Markers')
+    canvas = Canvas(root, width=600, height=600)
+    canvas.pack()
+    animator = CanvasAnimator(markers, canvas, size=3)
+    FixedStepScheduler(root, 1 / 60, markers.advance, animator.render).start()
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 from tkinter import *
 from math import *
+
+from trajectory import TrajectoryBank, MarkerSet, FixedStepScheduler, circle
+from canvas_animator import CanvasAnimator
 # import time
 #
 # length = 600
@@ -51,7 +54,12 @@ class Painting(object):
         self.root = root
         self.speed = speed
         self.point = None
-        self.angle = 0
+        self.animator = None
+        # Положения на окружности считаются один раз, точка двигается по фазе периода
+        self.trajectory = TrajectoryBank([circle(x0, y0, radius)], samples=180)
+        # Раньше угол рос на 2 градуса каждые speed мс - переводим это в обороты в секунду
+        # Ввод 6 и больше даёт задержку 0 мс или меньше - берём минимальную, 1 мс
+        self.marker = MarkerSet(self.trajectory, [0], [2 / 360 / (max(self.speed, 1) / 1000)])
         self.canvas = Canvas(self.root, width=length, height=length)
         self.canvas.pack()
 
@@ -65,26 +73,24 @@ class Painting(object):
         return circle
 
     def create_point(self):
-        x1, y1 = x0+radius*cos(radians(self.angle)), y0+radius*sin(radians(self.angle))
-
         if self.point is None:
-            self.point = self.canvas.create_oval(x1+5, y1+5, x1-5, y1-5, fill='black')
+            self.animator = CanvasAnimator(self.marker, self.canvas, size=5, fill='black')
+            self.point = self.animator.items[0]
 
         return self.point
 
 
-    def add_point_movement(self):
-        x1, y1 = x0+radius*cos(radians(self.angle)), y0+radius*sin(radians(self.angle))
-
-        self.canvas.coords(self.point, x1+5, y1+5, x1-5, y1-5)
-        self.angle += 2
+    def add_point_movement(self, ahead=0.0):
+        self.animator.render(ahead)
 
-        self.root.after(speed, self.add_point_movement)
+    def start(self):
+        scheduler = FixedStepScheduler(self.root, 1 / 120, self.marker.advance, self.add_point_movement)
+        scheduler.start()
 
 
 
 
 paint = Painting(root, speed)
-paint.add_point_movement()
+paint.start()
 root.mainloop()
 
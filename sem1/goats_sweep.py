@@ -0,0 +1,122 @@
+import argparse
+import itertools
+import random
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from pen_model import Goat, Pen
+
+# Диапазоны совпадают со спинбоксами окна (скорость и выносливость в тех же единицах)
+SPEED_RANGE = (5, 8)
+ENDURANCE_RANGE = (2, 4)
+CABBAGE_VALUE_RANGE = (200, 1000)
+HERD_RANGE = (1, 10)
+
+
+# Замеры идут на тиках 0, sample_every, ... меньше max_ticks, поэтому длина кривой - деление с округлением вверх
+def curve_length(max_ticks, sample_every):
+    return -(-max_ticks // sample_every)
+
+
+# Один прогон загона без окна: возвращает время жизни стада и кривую голода
+def run_config(config, max_ticks=5000, sample_every=50, cabbages=7):
+    speed, endurance, cabbage_value, herd_size, seed = config
+    rng = random.Random(seed)
+    pen = Pen(cabbages=cabbages, goats=0, cabbage_value=cabbage_value, rng=rng)
+    pen.pen.extend(Goat(speed=speed, endurance=endurance, rng=rng) for _ in range(herd_size))
+
+    curve = np.zeros(curve_length(max_ticks, sample_every), dtype=np.float32)
+    while pen.pen and pen.tick < max_ticks:
+        if pen.tick % sample_every == 0:
+            curve[pen.tick // sample_every] = sum(goat.starve for goat in pen.pen) / len(pen.pen)
+        pen.step()
+    return pen.tick, not pen.pen, pen.cabbages_eaten, curve
+
+
+def _run_indexed(args):
+    index, config, max_ticks, sample_every = args
+    return index, run_config(config, max_ticks, sample_every)
+
+
+def grid_configs(speeds, endurances, values, herds, seed):
+    configs = []
+    for i, (speed, endurance, value, herd) in enumerate(itertools.product(speeds, endurances, values, herds)):
+        configs.append((speed, endurance, value, herd, seed + i))
+    return configs
+
+
+def random_configs(samples, seed):
+    rng = random.Random(seed)
+    configs = []
+    for i in range(samples):
+        configs.append((rng.randint(*SPEED_RANGE), rng.randint(*ENDURANCE_RANGE),
+                        rng.randint(*CABBAGE_VALUE_RANGE), rng.randint(*HERD_RANGE), seed + i))
+    return configs
+
+
+def run_sweep(configs, max_ticks=5000, sample_every=50, workers=None):
+    count = len(configs)
+    survival = np.zeros(count, dtype=np.int32)
+    extinct = np.zeros(count, dtype=bool)
+    eaten = np.zeros(count, dtype=np.int32)
+    curves = np.zeros((count, curve_length(max_ticks, sample_every)), dtype=np.float32)
+
+    jobs = [(i, config, max_ticks, sample_every) for i, config in enumerate(configs)]
+    with Pool(workers) as pool:
+        # Результаты приходят в любом порядке, раскладываем по индексу конфигурации
+        for i, (ticks, dead, cabbages_eaten, curve) in pool.imap_unordered(_run_indexed, jobs, chunksize=8):
+            survival[i] = ticks
+            extinct[i] = dead
+            eaten[i] = cabbages_eaten
+            curves[i] = curve
+
+    columns = np.array(configs, dtype=np.int64).reshape(count, 5)
+    return {
+        "speed": columns[:, 0].astype(np.int16),
+        "endurance": columns[:, 1].astype(np.int16),
+        "cabbage_value": columns[:, 2].astype(np.int16),
+        "herd_size": columns[:, 3].astype(np.int16),
+        "seed": columns[:, 4],
+        "survival_ticks": survival,
+        "extinct": extinct,
+        "cabbages_eaten": eaten,
+        "starvation_curve": curves,
+        "sample_every": np.int32(sample_every),
+    }
+
+
+def parse_values(text):
+    return [int(value) for value in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter sweep over headless goat pen simulations")
+    parser.add_argument("--speeds", type=parse_values, default=list(range(SPEED_RANGE[0], SPEED_RANGE[1] + 1)))
+    parser.add_argument("--endurances", type=parse_values,
+                        default=list(range(ENDURANCE_RANGE[0], ENDURANCE_RANGE[1] + 1)))
+    parser.add_argument("--values", type=parse_values, default=[200, 400, 600, 800, 1000])
+    parser.add_argument("--herds", type=parse_values, default=[1, 2, 5, 10])
+    parser.add_argument("--samples", type=int, default=0,
+                        help="number of random configurations instead of the full grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-ticks", type=int, default=5000)
+    parser.add_argument("--sample-every", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="sweep_results.npz")
+    args = parser.parse_args()
+
+    if args.samples:
+        configs = random_configs(args.samples, args.seed)
+    else:
+        configs = grid_configs(args.speeds, args.endurances, args.values, args.herds, args.seed)
+
+    start = time.perf_counter()
+    results = run_sweep(configs, args.max_ticks, args.sample_every, args.workers)
+    np.savez(args.out, **results)
+    print(f"{len(configs)} configurations in {time.perf_counter() - start:.1f} s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import math
+import random
+
+
+class Cabbage(object):
+    def __init__(self, value=None, x_coord=None, y_coord=None, rng=None):
+        rng = rng or random
+        self.value = value if value else rng.randint(200, 500)
+        self.radius = self.change_radius()
+        self.x_coord = x_coord if x_coord else rng.randint(150, 500)
+        self.y_coord = y_coord if y_coord else rng.randint(150, 500)
+        self.eaten_status = False
+        self.slot = None
+
+    def reset(self, value, x_coord, y_coord):
+        self.value = value
+        self.radius = self.change_radius()
+        self.x_coord = x_coord
+        self.y_coord = y_coord
+        self.eaten_status = False
+
+    def change_radius(self):
+        return self.value ** 0.4
+
+    @property
+    def get_x_coord(self):
+        return self.x_coord
+
+    @property
+    def get_y_coord(self):
+        return self.y_coord
+
+    @property
+    def get_radius(self):
+        return self.radius
+
+
+# Правила появления капусты: замена съеденной, скорость роста, предел плотности и размещение
+class SpawnPolicy(object):
+    def __init__(self, replace_eaten=True, regrowth_rate=0.0, max_cabbages=500, distribution="uniform",
+                 bounds=(150, 500), clusters=((250, 250), (400, 380)), spread=30.0):
+        if distribution not in ("uniform", "clustered"):
+            raise ValueError(f"unknown distribution: {distribution}")
+        self.replace_eaten = replace_eaten
+        self.regrowth_rate = regrowth_rate  # вероятность появления новой капусты за тик
+        self.max_cabbages = max_cabbages
+        self.distribution = distribution
+        self.bounds = bounds
+        self.clusters = clusters
+        self.spread = spread
+
+    def position(self, rng):
+        low, high = self.bounds
+        if self.distribution == "uniform":
+            return rng.randint(low, high), rng.randint(low, high)
+        center_x, center_y = rng.choice(self.clusters)
+        x_coord = min(max(rng.gauss(center_x, self.spread), low), high)
+        y_coord = min(max(rng.gauss(center_y, self.spread), low), high)
+        return x_coord, y_coord
+
+
+# Равномерная сетка для поиска ближайшей капусты: смотрим только соседние клетки
+class SpatialGrid(object):
+    def __init__(self, cell_size=32):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.count = 0
+        self.bounds = None  # min_cx, min_cy, max_cx, max_cy занятых когда-либо клеток
+
+    def cell(self, x_coord, y_coord):
+        return int(x_coord // self.cell_size), int(y_coord // self.cell_size)
+
+    def cabbage_added(self, cabbage):
+        key = self.cell(cabbage.x_coord, cabbage.y_coord)
+        self.cells.setdefault(key, []).append(cabbage)
+        self.count += 1
+        if self.bounds is None:
+            self.bounds = key + key
+        else:
+            min_cx, min_cy, max_cx, max_cy = self.bounds
+            self.bounds = (min(min_cx, key[0]), min(min_cy, key[1]), max(max_cx, key[0]), max(max_cy, key[1]))
+
+    def cabbage_removed(self, cabbage):
+        key = self.cell(cabbage.x_coord, cabbage.y_coord)
+        bucket = self.cells[key]
+        bucket.remove(cabbage)
+        if not bucket:
+            del self.cells[key]
+        self.count -= 1
+
+    def nearest(self, x_coord, y_coord):
+        if not self.count:
+            return None
+        cx, cy = self.cell(x_coord, y_coord)
+        min_cx, min_cy, max_cx, max_cy = self.bounds
+        max_ring = max(abs(cx - min_cx), abs(cx - max_cx), abs(cy - min_cy), abs(cy - max_cy))
+
+        best, best_distance = None, math.inf
+        for ring in range(max_ring + 1):
+            for key in self.ring_cells(cx, cy, ring):
+                for cabbage in self.cells.get(key, ()):
+                    distance = math.hypot(cabbage.x_coord - x_coord, cabbage.y_coord - y_coord)
+                    if distance < best_distance:
+                        best, best_distance = cabbage, distance
+            # Всё, что дальше этого кольца, не ближе ring * cell_size
+            if best is not None and best_distance <= ring * self.cell_size:
+                break
+        return best
+
+    @staticmethod
+    def ring_cells(cx, cy, ring):
+        if ring == 0:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+
+# Поле капусты: объекты лежат в пуле слотов, живые - в slots[:count].
+# Удаление по индексу слота за O(1) (последний живой переезжает на место удалённого).
+class CabbageField(object):
+    def __init__(self, policy=None, rng=None, capacity=16):
+        self.policy = policy or SpawnPolicy()
+        self.rng = rng or random
+        self.slots = [self.new_slot() for _ in range(capacity)]
+        self.count = 0
+        self.listeners = []
+
+    @staticmethod
+    def new_slot():
+        cabbage = Cabbage.__new__(Cabbage)
+        cabbage.slot = None
+        return cabbage
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.slots[:self.count])
+
+    def __getitem__(self, index):
+        if index >= self.count:
+            raise IndexError(index)
+        return self.slots[index]
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+        for cabbage in self:
+            listener.cabbage_added(cabbage)
+
+    def place(self, value, x_coord, y_coord):
+        if self.count == len(self.slots):
+            # Пул растёт удвоением, чтобы при постоянной смене капусты не было новых объектов
+            self.slots.extend(self.new_slot() for _ in range(len(self.slots)))
+        cabbage = self.slots[self.count]
+        cabbage.reset(value, x_coord, y_coord)
+        cabbage.slot = self.count
+        self.count += 1
+        for listener in self.listeners:
+            listener.cabbage_added(cabbage)
+        return cabbage
+
+    def spawn(self, value, x_coord, y_coord):
+        if self.count >= self.policy.max_cabbages:
+            return None
+        return self.place(value, x_coord, y_coord)
+
+    def spawn_random(self, value=None):
+        value = value if value else self.rng.randint(200, 500)
+        x_coord, y_coord = self.policy.position(self.rng)
+        return self.spawn(value, x_coord, y_coord)
+
+    def remove(self, cabbage):
+        for listener in self.listeners:
+            listener.cabbage_removed(cabbage)
+        slot = cabbage.slot
+        self.count -= 1
+        last = self.slots[self.count]
+        self.slots[slot], self.slots[self.count] = last, cabbage
+        last.slot = slot
+        cabbage.slot = None
+
+    def regrow(self, value=None):
+        if self.policy.regrowth_rate and self.rng.random() < self.policy.regrowth_rate:
+            self.spawn_random(value)
@@ -0,0 +1,248 @@
+import argparse
+import time
+
+import numpy as np
+
+# Геометрия загона из Graphical_view.paintEvent: drawEllipse(cx - r, cy - r, 2r, 1.7r) при окне 750x750, r = 350
+PEN_CENTER = (375.0, 322.5)
+PEN_AXES = (350.0, 297.5)
+FIELD = (150, 500)
+CHUNK = 2048
+PAIR_CHUNK = 16384
+
+GOAT_COLUMNS = ("x", "y", "starve", "speed", "endurance", "eating")
+CABBAGE_COLUMNS = ("x", "y", "value")
+
+
+# Пары соседей ближе radius через сетку с клетками размера radius: каждая коза смотрит только 9 клеток вокруг.
+# Из каждой клетки берётся не больше половины max_neighbours коз (круг радиуса - около трети этих 9 клеток),
+# из найденных остаются max_neighbours ближайших, поэтому в плотном загоне работа и память растут линейно
+# с числом коз. Пары выдаются частями по chunk коз: (часть, first, second), все first лежат внутри части
+def neighbour_pairs(x, y, radius, max_neighbours=8, chunk=PAIR_CHUNK):
+    count = x.size
+    if count < 2:
+        return
+    cell_x = np.floor(x / radius).astype(np.int64)
+    cell_y = np.floor(y / radius).astype(np.int64)
+    cell_x -= cell_x.min() - 1
+    cell_y -= cell_y.min() - 1
+    height = cell_y.max() + 2
+    keys = cell_x * height + cell_y
+    order = np.argsort(keys, kind="stable").astype(np.int32)
+    # Начало каждой клетки в order; загон ограничен, поэтому таблица клеток небольшая
+    cell_start = np.zeros(keys.max() + height + 3, dtype=np.int32)
+    np.cumsum(np.bincount(keys, minlength=cell_start.size - 1), out=cell_start[1:])
+
+    offsets = np.array([dx * height + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+    window = np.arange((max_neighbours + 1) // 2, dtype=np.int32)
+    for begin in range(0, count, chunk):
+        owners = np.arange(begin, min(begin + chunk, count), dtype=np.int32)
+        target = keys[owners, None] + offsets
+        start = cell_start[target]
+        counts = cell_start[target + 1] - start
+        # Кандидаты - матрица (коза, клетка x место): окно в клетке сдвинуто на номер козы,
+        # чтобы в плотной клетке козы видели разных соседей
+        within = (owners[:, None, None] + window) % np.maximum(counts, 1)[:, :, None]
+        other = order[np.minimum(start[:, :, None] + within, count - 1)].reshape(owners.size, -1)
+        valid = (window < counts[:, :, None]).reshape(owners.size, -1) & (other != owners[:, None])
+        squared = (x[other] - x[owners, None]) ** 2 + (y[other] - y[owners, None]) ** 2
+        squared[~valid] = np.inf
+        nearest = np.argpartition(squared, max_neighbours - 1, axis=1)[:, :max_neighbours]
+        other = np.take_along_axis(other, nearest, axis=1)
+        close = np.take_along_axis(squared, nearest, axis=1) < radius ** 2
+        yield slice(begin, begin + owners.size), np.broadcast_to(owners[:, None], close.shape)[close], other[close]
+
+
+def group_rank(groups):
+    # Номер элемента внутри подряд идущей группы одинаковых значений
+    index = np.arange(groups.size)
+    starts = np.r_[True, groups[1:] != groups[:-1]]
+    return index - np.maximum.accumulate(np.where(starts, index, 0)), starts
+
+
+# Всё стадо считается массивами NumPy за один шаг, без объектов Goat/Cabbage
+class HerdModel(object):
+    def __init__(self, goats=1000, cabbages=100, seed=0, eat_slots=2, neighbour_radius=12.0,
+                 separation_radius=6.0, separation_weight=0.6, cohesion_weight=0.05, max_neighbours=8):
+        self.rng = np.random.default_rng(seed)
+        self.eat_slots = eat_slots
+        self.neighbour_radius = neighbour_radius
+        self.max_neighbours = max_neighbours  # Сколько ближайших соседей учитывает одна коза
+        self.separation_radius = separation_radius
+        self.separation_weight = separation_weight
+        self.cohesion_weight = cohesion_weight
+        self.tick = 0
+        self.cabbages_eaten = 0
+
+        self.goats = {
+            "x": self.rng.integers(100, 501, goats).astype(np.float64),
+            "y": self.rng.integers(100, 501, goats).astype(np.float64),
+            "starve": np.full(goats, 800.0),
+            "speed": self.rng.uniform(0.5, 0.8, goats),
+            "endurance": self.rng.integers(2, 5, goats).astype(np.float64),
+            "eating": np.zeros(goats, dtype=bool),
+        }
+        self.cabbages = {
+            "x": self.rng.integers(FIELD[0], FIELD[1] + 1, cabbages).astype(np.float64),
+            "y": self.rng.integers(FIELD[0], FIELD[1] + 1, cabbages).astype(np.float64),
+            "value": self.rng.integers(200, 501, cabbages).astype(np.float64),
+        }
+
+    # Стадо из готовых колонок (например, отображённых из файла снимка) без генерации случайного состояния
+    @classmethod
+    def from_columns(cls, goats, cabbages, seed=0, tick=0, cabbages_eaten=0, **options):
+        herd = cls(0, 0, seed, **options)
+        herd.goats = {name: goats[name] for name in GOAT_COLUMNS}
+        herd.cabbages = {name: cabbages[name] for name in CABBAGE_COLUMNS}
+        herd.tick = tick
+        herd.cabbages_eaten = cabbages_eaten
+        return herd
+
+    def __len__(self):
+        return self.goats["x"].size
+
+    def nearest_cabbages(self, x, y):
+        cabbage_x, cabbage_y = self.cabbages["x"], self.cabbages["y"]
+        nearest = np.zeros(x.size, dtype=np.int64)
+        distance = np.full(x.size, np.inf)
+        if cabbage_x.size == 0:
+            return nearest, distance
+        for start in range(0, x.size, CHUNK):
+            part = slice(start, start + CHUNK)
+            squared = (cabbage_x[None, :] - x[part, None]) ** 2 + (cabbage_y[None, :] - y[part, None]) ** 2
+            nearest[part] = squared.argmin(axis=1)
+            distance[part] = np.sqrt(squared[np.arange(nearest[part].size), nearest[part]])
+        return nearest, distance
+
+    def flocking(self, x, y):
+        force_x = np.zeros(x.size)
+        force_y = np.zeros(x.size)
+        for part, first, second in neighbour_pairs(x, y, self.neighbour_radius, self.max_neighbours):
+            size = part.stop - part.start
+            owner = first - part.start
+            delta_x = x[first] - x[second]
+            delta_y = y[first] - y[second]
+            distance = np.maximum(np.hypot(delta_x, delta_y), 1e-9)
+
+            # Разделение: отталкивание тем сильнее, чем ближе сосед
+            push = np.clip(self.separation_radius - distance, 0, None) / (self.separation_radius * distance)
+            force_x[part] += np.bincount(owner, delta_x * push, minlength=size) * self.separation_weight
+            force_y[part] += np.bincount(owner, delta_y * push, minlength=size) * self.separation_weight
+
+            # Сплочение: притяжение к центру соседей
+            neighbours = np.bincount(owner, minlength=size)
+            has = neighbours > 0
+            mean_x = np.bincount(owner, x[second], minlength=size)
+            mean_y = np.bincount(owner, y[second], minlength=size)
+            force_x[part][has] += (mean_x[has] / neighbours[has] - x[part][has]) * self.cohesion_weight
+            force_y[part][has] += (mean_y[has] / neighbours[has] - y[part][has]) * self.cohesion_weight
+        return force_x, force_y
+
+    def keep_inside(self, x, y):
+        # Точки за эллипсом загона возвращаются на его границу по лучу из центра
+        center_x, center_y = PEN_CENTER
+        axis_x, axis_y = PEN_AXES
+        scale = ((x - center_x) / axis_x) ** 2 + ((y - center_y) / axis_y) ** 2
+        outside = scale > 1
+        factor = 1 / np.sqrt(scale[outside])
+        x[outside] = center_x + (x[outside] - center_x) * factor
+        y[outside] = center_y + (y[outside] - center_y) * factor
+
+    def eat(self, nearest, distance, radius):
+        goats, cabbages = self.goats, self.cabbages
+        starve = goats["starve"]
+        reach = np.flatnonzero(distance <= radius / 5)
+        eating = np.zeros(starve.size, dtype=bool)
+        if reach.size == 0:
+            return eating
+
+        # На каждом кочане eat_slots мест, первыми едят самые голодные козы
+        order = np.lexsort((starve[reach], nearest[reach]))
+        candidates = reach[order]
+        rank, _ = group_rank(nearest[candidates])
+        winners = candidates[rank < self.eat_slots]
+        target = nearest[winners]
+
+        eat_speed = np.where(starve[winners] > 700, 10.0, (800 - starve[winners]) // 10)
+        eaten_before = np.cumsum(eat_speed) - eat_speed
+        _, starts = group_rank(target)
+        eaten_before -= eaten_before[np.maximum.accumulate(np.where(starts, np.arange(target.size), 0))]
+        bite = np.clip(cabbages["value"][target] - eaten_before, 0, eat_speed)
+
+        starve[winners] += bite
+        cabbages["value"] -= np.bincount(target, bite, minlength=cabbages["value"].size)
+        goats["x"][winners] = cabbages["x"][target]
+        goats["y"][winners] = cabbages["y"][target]
+        eating[winners] = True
+        return eating
+
+    def regrow(self):
+        cabbages = self.cabbages
+        finished = np.flatnonzero(cabbages["value"] <= 0)
+        if finished.size:
+            cabbages["x"][finished] = self.rng.integers(FIELD[0], FIELD[1] + 1, finished.size)
+            cabbages["y"][finished] = self.rng.integers(FIELD[0], FIELD[1] + 1, finished.size)
+            cabbages["value"][finished] = self.rng.integers(200, 501, finished.size)
+            self.cabbages_eaten += finished.size
+
+    def step(self):
+        goats = self.goats
+        if len(self) == 0:
+            self.tick += 1
+            return
+        x, y, starve = goats["x"], goats["y"], goats["starve"]
+        radius = starve ** 0.35
+        nearest, distance = self.nearest_cabbages(x, y)
+        eating = self.eat(nearest, distance, radius)
+
+        walking = ~eating
+        force_x, force_y = self.flocking(x, y)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            seek_x = np.where(distance > 0, (self.cabbages["x"][nearest] - x) / distance, 0)
+            seek_y = np.where(distance > 0, (self.cabbages["y"][nearest] - y) / distance, 0)
+        velocity_x = seek_x + force_x
+        velocity_y = seek_y + force_y
+        norm = np.maximum(np.hypot(velocity_x, velocity_y), 1)
+        speed = goats["speed"]
+        x[walking] += (velocity_x / norm * speed)[walking]
+        y[walking] += (velocity_y / norm * speed)[walking]
+        self.keep_inside(x, y)
+
+        starve[walking] -= goats["endurance"][walking]
+        goats["eating"] = eating
+        self.regrow()
+
+        alive = starve > 0
+        if not alive.all():
+            for name in GOAT_COLUMNS:
+                goats[name] = goats[name][alive]
+        self.tick += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorised goat herd with flocking and eat-slot contention")
+    parser.add_argument("--goats", type=int, default=20000)
+    parser.add_argument("--cabbages", type=int, default=300)
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--load", default=None, help="start from a snapshot instead of a random herd")
+    parser.add_argument("--save", default=None, help="write a snapshot after the run")
+    args = parser.parse_args()
+
+    from pen_snapshot import load_herd, save_herd
+    if args.load:
+        herd = load_herd(args.load, args.seed)
+    else:
+        herd = HerdModel(args.goats, args.cabbages, args.seed)
+    start = time.perf_counter()
+    while herd.tick < args.ticks and len(herd):
+        herd.step()
+    elapsed = time.perf_counter() - start
+    print(f"{herd.tick} ticks in {elapsed:.2f} s ({elapsed / max(herd.tick, 1) * 1000:.1f} ms/tick), "
+          f"goats alive {len(herd)}, cabbages eaten {herd.cabbages_eaten}")
+    if args.save:
+        save_herd(args.save, herd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import time
+import warnings
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from pen_snapshot import GOAT_COLUMNS, CABBAGE_COLUMNS, aligned, pen_columns
+
+# Живой просмотр загона из другого процесса: именованная общая память с заголовком и колонками.
+# Заголовок - 8 чисел uint64, колонки идут после него с выравниванием на 64 байта, ёмкость задаётся при создании.
+# Согласованность через seqlock: писатель делает счётчик нечётным, пишет и делает чётным; читатель
+# копирует колонки и повторяет, если счётчик был нечётным или изменился за время чтения.
+MAGIC = 0x50454E4C49564531  # "PENLIVE1"
+MAGIC_FIELD, SEQUENCE, TICK, GOATS, CABBAGES, CABBAGES_EATEN, GOAT_CAPACITY, CABBAGE_CAPACITY = range(8)
+HEADER_SIZE = 64
+
+
+def layout(goat_capacity, cabbage_capacity):
+    offsets = {}
+    offset = HEADER_SIZE
+    for group, kinds, capacity in (("goats", GOAT_COLUMNS, goat_capacity),
+                                   ("cabbages", CABBAGE_COLUMNS, cabbage_capacity)):
+        for name, dtype in kinds.items():
+            offsets[group, name] = offset
+            offset = aligned(offset + capacity * np.dtype(dtype).itemsize)
+    return offsets, offset
+
+
+def views(buffer, goat_capacity, cabbage_capacity):
+    offsets, _ = layout(goat_capacity, cabbage_capacity)
+    header = np.ndarray((8,), dtype=np.uint64, buffer=buffer)
+    goats = {name: np.ndarray((goat_capacity,), dtype=dtype, buffer=buffer, offset=offsets["goats", name])
+             for name, dtype in GOAT_COLUMNS.items()}
+    cabbages = {name: np.ndarray((cabbage_capacity,), dtype=dtype, buffer=buffer, offset=offsets["cabbages", name])
+                for name, dtype in CABBAGE_COLUMNS.items()}
+    return header, goats, cabbages
+
+
+class PenPublisher(object):
+    def __init__(self, name, goat_capacity=4096, cabbage_capacity=1024):
+        _, size = layout(goat_capacity, cabbage_capacity)
+        self.memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.header, self.goats, self.cabbages = views(self.memory.buf, goat_capacity, cabbage_capacity)
+        self.header[:] = 0
+        self.header[GOAT_CAPACITY], self.header[CABBAGE_CAPACITY] = goat_capacity, cabbage_capacity
+        self.header[MAGIC_FIELD] = MAGIC
+        self.truncated = False  # Предупреждение об обрезанном снимке выдаётся один раз
+
+    # Сверх ёмкости сущности не публикуются, в заголовке остаётся число опубликованных
+    def publish(self, goats, cabbages, tick, cabbages_eaten):
+        goat_count = min(len(goats["x"]), self.goats["x"].size)
+        cabbage_count = min(len(cabbages["x"]), self.cabbages["x"].size)
+        if not self.truncated and (goat_count < len(goats["x"]) or cabbage_count < len(cabbages["x"])):
+            self.truncated = True
+            warnings.warn(f"live snapshot truncated to {goat_count} of {len(goats['x'])} goats and "
+                          f"{cabbage_count} of {len(cabbages['x'])} cabbages, raise the publisher capacity")
+        self.header[SEQUENCE] += 1
+        for target, source, count in ((self.goats, goats, goat_count), (self.cabbages, cabbages, cabbage_count)):
+            for name, column in target.items():
+                if name in source:
+                    column[:count] = source[name][:count]
+                else:
+                    column[:count] = 0
+        self.header[TICK], self.header[CABBAGES_EATEN] = tick, cabbages_eaten
+        self.header[GOATS], self.header[CABBAGES] = goat_count, cabbage_count
+        self.header[SEQUENCE] += 1
+
+    def publish_pen(self, pen):
+        goats, cabbages = pen_columns(pen)
+        self.publish(goats, cabbages, pen.tick, pen.cabbages_eaten)
+
+    def publish_herd(self, herd):
+        self.publish(herd.goats, herd.cabbages, herd.tick, herd.cabbages_eaten)
+
+    def close(self):
+        # Заголовок и колонки публикатора смотрят в сегмент, поэтому сбрасываются до его закрытия и удаления
+        self.header = self.goats = self.cabbages = None
+        self.memory.close()
+        self.memory.unlink()
+
+
+class PenReader(object):
+    def __init__(self, name):
+        self.memory = shared_memory.SharedMemory(name=name)
+        # Читатель не владеет памятью: без этого трекер ресурсов удалит её при выходе читателя
+        resource_tracker.unregister(self.memory._name, "shared_memory")
+        header = np.ndarray((8,), dtype=np.uint64, buffer=self.memory.buf)
+        if int(header[MAGIC_FIELD]) != MAGIC:
+            del header
+            self.memory.close()
+            raise ValueError(f"{name} is not a live pen segment")
+        capacities = int(header[GOAT_CAPACITY]), int(header[CABBAGE_CAPACITY])
+        del header
+        self.header, self.goats, self.cabbages = views(self.memory.buf, *capacities)
+        self.retries = 0
+
+    # Согласованный снимок (копии колонок) или None, если писатель не дал прочитать за attempts попыток
+    def snapshot(self, attempts=100):
+        for _ in range(attempts):
+            before = int(self.header[SEQUENCE])
+            if before % 2 == 0:
+                goat_count, cabbage_count = int(self.header[GOATS]), int(self.header[CABBAGES])
+                goats = {name: column[:goat_count].copy() for name, column in self.goats.items()}
+                cabbages = {name: column[:cabbage_count].copy() for name, column in self.cabbages.items()}
+                meta = {"tick": int(self.header[TICK]), "cabbages_eaten": int(self.header[CABBAGES_EATEN])}
+                if int(self.header[SEQUENCE]) == before:
+                    return goats, cabbages, meta
+            self.retries += 1
+            time.sleep(0)
+        return None
+
+    def close(self):
+        self.header = self.goats = self.cabbages = None
+        self.memory.close()
+
+
+def watch(name, rate):
+    reader = PenReader(name)
+    count, last_report = 0, time.perf_counter()
+    try:
+        while True:
+            snapshot = reader.snapshot()
+            if snapshot is not None:
+                count += 1
+            now = time.perf_counter()
+            if snapshot is not None and now - last_report >= 1:
+                goats, cabbages, meta = snapshot
+                starve = goats["starve"].mean() if goats["starve"].size else 0.0
+                print(f"tick {meta['tick']:>7}  goats {goats['x'].size:>8}  mean starve {starve:7.1f}  "
+                      f"cabbages {cabbages['x'].size:>5}  eaten {meta['cabbages_eaten']:>7}  "
+                      f"{count / (now - last_report):7.0f} snapshots/s  retries {reader.retries}")
+                count, last_report = 0, now
+            if rate:
+                time.sleep(1 / rate)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live view of a running goat pen through shared memory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    watch_parser = commands.add_parser("watch", help="read snapshots of a published pen and print statistics")
+    watch_parser.add_argument("name")
+    watch_parser.add_argument("--rate", type=float, default=50, help="snapshots per second, 0 - as fast as possible")
+    demo = commands.add_parser("demo", help="run a vectorised herd and publish it every tick")
+    demo.add_argument("name")
+    demo.add_argument("--goats", type=int, default=100000)
+    demo.add_argument("--cabbages", type=int, default=300)
+    demo.add_argument("--ticks", type=int, default=1000)
+    demo.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "watch":
+        watch(args.name, args.rate)
+        return
+
+    from pen_herd import HerdModel
+    herd = HerdModel(args.goats, args.cabbages, args.seed)
+    publisher = PenPublisher(args.name, args.goats, max(args.cabbages, 1024))
+    try:
+        publish_time = 0.0
+        start = time.perf_counter()
+        while herd.tick < args.ticks and len(herd):
+            herd.step()
+            before = time.perf_counter()
+            publisher.publish_herd(herd)
+            publish_time += time.perf_counter() - before
+        elapsed = time.perf_counter() - start
+        print(f"{herd.tick} ticks in {elapsed:.2f} s, publishing took {publish_time / max(herd.tick, 1) * 1000:.2f} "
+              f"ms/tick ({publish_time / elapsed * 100:.1f}% of the run)")
+    finally:
+        publisher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import argparse
+import bisect
+import mmap
+import os
+import random
+import struct
+
+from pen_model import Goat, Pen
+
+# Формат файла: заголовок, затем записи [тип, тик, длина] + данные.
+# Поле length в заголовке - сколько байт файла уже записано, всё что дальше - запас под mmap.
+MAGIC = b"PENLOG1\0"
+HEADER = struct.Struct("<8sQQI")  # magic, length, seed, snapshot_every
+RECORD = struct.Struct("<BII")  # type, tick, payload length
+
+EVENT_CABBAGE = 1
+EVENT_GOAT = 2
+EVENT_EDIT = 3
+EVENT_SNAPSHOT = 4
+
+CABBAGE_EVENT = struct.Struct("<ddd")  # value, x, y
+GOAT_EVENT = struct.Struct("<dddd")  # speed, endurance, x, y (в единицах конструктора Goat)
+EDIT_EVENT = struct.Struct("<Iddd")  # goat index, speed, starve, endurance
+
+SNAPSHOT_HEAD = struct.Struct("<IIIIdd?")  # goats, cabbages, eaten, rng index, cabbage_value, gauss_next, has gauss
+RNG_WORDS = struct.Struct("<624I")
+GOAT_STATE = struct.Struct("<ddddddd?")  # x, y, starve, speed, endurance, eat_speed, radius, eating
+CABBAGE_STATE = struct.Struct("<dddd?")  # x, y, value, radius, eaten
+
+GROW_STEP = 1 << 20
+
+
+def pack_snapshot(pen):
+    version, words, gauss_next = pen.rng.getstate()
+    parts = [SNAPSHOT_HEAD.pack(len(pen.pen), len(pen.cabbages), pen.cabbages_eaten, words[624],
+                                pen.cabbage_value or 0, gauss_next or 0.0, gauss_next is not None),
+             RNG_WORDS.pack(*words[:624])]
+    for goat in pen.pen:
+        parts.append(GOAT_STATE.pack(goat.x_coord, goat.y_coord, goat.starve, goat.speed, goat.endurance,
+                                     goat.eat_speed, goat.radius, goat.eating_status))
+    for cabbage in pen.cabbages:
+        parts.append(CABBAGE_STATE.pack(cabbage.x_coord, cabbage.y_coord, cabbage.value, cabbage.radius,
+                                        cabbage.eaten_status))
+    return b"".join(parts)
+
+
+def unpack_snapshot(data, tick):
+    goats, cabbages, eaten, index, cabbage_value, gauss, has_gauss = SNAPSHOT_HEAD.unpack_from(data, 0)
+    offset = SNAPSHOT_HEAD.size
+    words = RNG_WORDS.unpack_from(data, offset)
+    offset += RNG_WORDS.size
+
+    rng = random.Random()
+    rng.setstate((3, words + (index,), gauss if has_gauss else None))
+    pen = Pen(cabbages=0, goats=0, cabbage_value=int(cabbage_value) or None, rng=rng)
+    pen.tick = tick
+    pen.cabbages_eaten = eaten
+
+    for _ in range(goats):
+        x, y, starve, speed, endurance, eat_speed, radius, eating = GOAT_STATE.unpack_from(data, offset)
+        offset += GOAT_STATE.size
+        goat = Goat.__new__(Goat)
+        goat.x_coord, goat.y_coord, goat.starve = x, y, starve
+        goat.speed, goat.endurance, goat.eat_speed = speed, endurance, eat_speed
+        goat.radius, goat.eating_status = radius, eating
+        pen.pen.append(goat)
+    for _ in range(cabbages):
+        x, y, value, radius, eaten_status = CABBAGE_STATE.unpack_from(data, offset)
+        offset += CABBAGE_STATE.size
+        cabbage = pen.cabbages.place(value, x, y)
+        cabbage.radius, cabbage.eaten_status = radius, eaten_status
+    return pen
+
+
+# Запись сессии: подключается к Pen через pen.recorder
+class PenRecorder(object):
+    def __init__(self, path, seed, snapshot_every=600):
+        self.seed = seed
+        self.snapshot_every = snapshot_every
+        self.file = open(path, "w+b")
+        self.capacity = GROW_STEP
+        self.file.truncate(self.capacity)
+        self.map = mmap.mmap(self.file.fileno(), self.capacity)
+        self.length = HEADER.size
+        self.snapshot_tick = None
+        self.write_header()
+
+    def write_header(self):
+        HEADER.pack_into(self.map, 0, MAGIC, self.length, self.seed, self.snapshot_every)
+
+    def append(self, kind, tick, payload):
+        size = RECORD.size + len(payload)
+        if self.length + size > self.capacity:
+            self.map.close()
+            self.capacity = max(self.capacity * 2, self.length + size + GROW_STEP)
+            self.file.truncate(self.capacity)
+            self.map = mmap.mmap(self.file.fileno(), self.capacity)
+        RECORD.pack_into(self.map, self.length, kind, tick, len(payload))
+        self.map[self.length + RECORD.size:self.length + size] = payload
+        self.length += size
+        # Длину обновляем после данных: читатель никогда не увидит недописанную запись
+        self.write_header()
+
+    def record_cabbage(self, tick, value, x_coord, y_coord):
+        self.append(EVENT_CABBAGE, tick, CABBAGE_EVENT.pack(value, x_coord, y_coord))
+
+    def record_goat(self, tick, speed, endurance, x_coord, y_coord):
+        self.append(EVENT_GOAT, tick, GOAT_EVENT.pack(speed, endurance, x_coord, y_coord))
+
+    def record_edit(self, tick, index, speed, starve, endurance):
+        self.append(EVENT_EDIT, tick, EDIT_EVENT.pack(index, speed, starve, endurance))
+
+    # Снимок текущего состояния; с него можно начать запись загона, загруженного не с нулевого тика
+    def record_snapshot(self, pen):
+        self.append(EVENT_SNAPSHOT, pen.tick, pack_snapshot(pen))
+        self.snapshot_tick = pen.tick
+
+    def before_step(self, pen):
+        if pen.tick % self.snapshot_every == 0 and pen.tick != self.snapshot_tick:
+            self.record_snapshot(pen)
+
+    def close(self):
+        if self.map is None:
+            return
+        self.map.flush()
+        self.map.close()
+        self.map = None
+        self.file.truncate(self.length)
+        self.file.close()
+
+
+# Чтение записи и перемотка на любой тик от ближайшего снимка
+class PenReplay(object):
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.length, self.seed, self.snapshot_every = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a pen event log")
+        self.snapshot_ticks = []
+        self.snapshot_offsets = []
+        self.last_tick = 0
+        for kind, tick, offset in self.records(HEADER.size):
+            if kind == EVENT_SNAPSHOT:
+                self.snapshot_ticks.append(tick)
+                self.snapshot_offsets.append(offset)
+            self.last_tick = max(self.last_tick, tick)
+        if not self.snapshot_ticks:
+            raise ValueError(f"{path} has no snapshots")
+
+    def records(self, offset):
+        while offset < self.length:
+            kind, tick, size = RECORD.unpack_from(self.map, offset)
+            yield kind, tick, offset
+            offset += RECORD.size + size
+
+    def payload(self, offset):
+        _, _, size = RECORD.unpack_from(self.map, offset)
+        start = offset + RECORD.size
+        return self.map[start:start + size]
+
+    def seek(self, tick):
+        position = bisect.bisect_right(self.snapshot_ticks, tick) - 1
+        if position < 0:
+            raise ValueError(f"tick {tick} is before the first snapshot")
+        offset = self.snapshot_offsets[position]
+        pen = unpack_snapshot(self.payload(offset), self.snapshot_ticks[position])
+
+        for kind, event_tick, record_offset in self.records(offset):
+            if record_offset == offset or kind == EVENT_SNAPSHOT:
+                continue
+            if event_tick > tick:
+                break
+            while pen.tick < event_tick:
+                pen.step()
+            data = self.payload(record_offset)
+            if kind == EVENT_CABBAGE:
+                pen.spawn_cabbage(*CABBAGE_EVENT.unpack(data))
+            elif kind == EVENT_GOAT:
+                pen.spawn_goat(*GOAT_EVENT.unpack(data))
+            elif kind == EVENT_EDIT:
+                pen.edit_goat(*EDIT_EVENT.unpack(data))
+
+        while pen.tick < tick:
+            pen.step()
+        return pen
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a recorded goat pen session")
+    parser.add_argument("log")
+    parser.add_argument("--tick", type=int, default=None)
+    args = parser.parse_args()
+
+    replay = PenReplay(args.log)
+    print(f"seed {replay.seed}, {len(replay.snapshot_ticks)} snapshots, last recorded tick {replay.last_tick}, "
+          f"{os.path.getsize(args.log)} bytes")
+    if args.tick is not None:
+        pen = replay.seek(args.tick)
+        print(f"tick {pen.tick}: goats {len(pen.pen)}, cabbages eaten {pen.cabbages_eaten}")
+        print(pen.info_text())
+    replay.close()
+
+
+if __name__ == "__main__":
+    main()
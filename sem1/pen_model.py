@@ -0,0 +1,179 @@
+import random
+from time import perf_counter
+
+from pen_field import CabbageField, SpatialGrid
+
+
+class Goat(object):
+    def __init__(self, speed=None, endurance=None, x_coord=None, y_coord=None, rng=None):
+        rng = rng or random
+        self.x_coord = x_coord if x_coord else rng.randint(100, 500)
+        self.y_coord = y_coord if y_coord else rng.randint(100, 500)
+        self.starve = 800
+        self.speed = speed / 10 if speed else rng.uniform(0.5, 0.8)
+        self.eat_speed = self.change_eat_speed()
+        self.endurance = endurance / 10 if endurance else rng.randint(2, 4)
+        self.radius = self.change_radius()
+        self.eating_status = False
+
+    def change_radius(self):
+        return self.starve ** 0.35
+
+    def change_eat_speed(self):
+        if self.starve > 700:
+            return 10
+        return (800 - self.starve) // 10
+
+    def animate_circles(self):
+        self.radius = self.change_radius()
+        self.eat_speed = self.change_eat_speed()
+
+    @property
+    def get_x_coord(self):
+        return self.x_coord
+
+    @property
+    def get_y_coord(self):
+        return self.y_coord
+
+    @property
+    def get_radius(self):
+        return self.radius
+
+    @property
+    def get_speed(self):
+        return self.speed
+
+    @property
+    def get_starve(self):
+        return self.starve
+
+    @property
+    def get_endurance(self):
+        return self.endurance
+
+
+def get_closest(x1, x2, y1, y2):
+    return ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
+
+
+# Состояние загона без Qt: один вызов step() - один тик таймера окна
+class Pen(object):
+    def __init__(self, cabbages=7, goats=2, cabbage_value=None, rng=None, policy=None):
+        self.rng = rng or random.Random()
+        self.cabbage_value = cabbage_value
+        self.cabbages = CabbageField(policy, self.rng)
+        self.grid = SpatialGrid()
+        self.cabbages.add_listener(self.grid)
+        for _ in range(cabbages):
+            self.add_cabbage()
+        self.pen = [Goat(rng=self.rng) for _ in range(goats)]
+        self.tick = 0
+        self.cabbages_eaten = 0
+        self.last_goat = None
+        self.last_cabbage = None
+        self.recorder = None
+        self.profiler = None
+
+    def add_cabbage(self):
+        return self.cabbages.spawn_random(self.cabbage_value)
+
+    # Изменения извне (кнопки и диалог окна) идут через эти методы, чтобы их можно было записать
+    def spawn_cabbage(self, value, x_coord, y_coord):
+        if self.recorder is not None:
+            self.recorder.record_cabbage(self.tick, value, x_coord, y_coord)
+        return self.cabbages.spawn(value, x_coord, y_coord)
+
+    def spawn_goat(self, speed, endurance, x_coord, y_coord):
+        if self.recorder is not None:
+            self.recorder.record_goat(self.tick, speed, endurance, x_coord, y_coord)
+        new_goat = Goat(speed=speed, endurance=endurance, x_coord=x_coord, y_coord=y_coord)
+        self.pen.append(new_goat)
+        return new_goat
+
+    def edit_goat(self, index, speed, starve, endurance):
+        if self.recorder is not None:
+            self.recorder.record_edit(self.tick, index, speed, starve, endurance)
+        goat = self.pen[index]
+        goat.speed = speed
+        goat.starve = starve
+        goat.endurance = endurance
+
+    def step(self):
+        if self.recorder is not None:
+            self.recorder.before_step(self)
+        profiler = self.profiler
+        for goat in list(self.pen):
+            if profiler is not None:
+                started = perf_counter()
+            closest_cabbage = self.grid.nearest(goat.x_coord, goat.y_coord)
+            if profiler is not None:
+                found = perf_counter()
+                profiler.add("nearest", found - started)
+            if closest_cabbage is None:
+                # Капусты нет (например, упёрлись в предел поля без замены съеденной) - коза только голодает
+                goat.starve -= goat.endurance
+                goat.animate_circles()
+                if goat.starve <= 0:
+                    self.pen.remove(goat)
+                continue
+            distance = get_closest(goat.get_x_coord, closest_cabbage.get_x_coord, goat.get_y_coord,
+                                   closest_cabbage.get_y_coord)
+            if distance != 0:
+
+                direction_x = closest_cabbage.get_x_coord - goat.get_x_coord
+                direction_y = closest_cabbage.get_y_coord - goat.get_y_coord
+
+                direction_x /= distance
+                direction_y /= distance
+
+                if distance <= goat.get_radius / 5:
+                    goat.x_coord = closest_cabbage.get_x_coord
+                    goat.y_coord = closest_cabbage.get_y_coord
+                    goat.eating_status = True
+
+                else:
+                    goat.eating_status = False
+                    goat.x_coord += direction_x * goat.get_speed
+                    goat.y_coord += direction_y * goat.get_speed
+
+                goat.starve -= goat.endurance
+                goat.animate_circles()
+                if profiler is not None:
+                    profiler.add("movement", perf_counter() - found)
+
+            else:
+                if closest_cabbage.value > goat.eat_speed:
+                    closest_cabbage.eaten_status = True
+                    closest_cabbage.value -= goat.eat_speed
+                    closest_cabbage.radius = closest_cabbage.change_radius()
+                    goat.starve += goat.eat_speed
+                    goat.animate_circles()
+
+                else:
+                    closest_cabbage.eaten_status = True
+                    goat.starve += closest_cabbage.value
+                    goat.animate_circles()
+                    closest_cabbage.value = 0
+                    self.cabbages.remove(closest_cabbage)
+                    self.cabbages_eaten += 1
+                    if self.cabbages.policy.replace_eaten:
+                        self.add_cabbage()
+                if profiler is not None:
+                    profiler.add("eating", perf_counter() - found)
+
+            if goat.starve <= 0:
+                self.pen.remove(goat)
+                continue
+
+            self.last_goat = goat
+            self.last_cabbage = closest_cabbage
+        self.cabbages.regrow(self.cabbage_value)
+        self.tick += 1
+
+    def info_text(self):
+        goat, cabbage = self.last_goat, self.last_cabbage
+        if goat is None:
+            return f"Cabbages: {len(self.cabbages)}"
+        return f"Cabbages: {len(self.cabbages)}, Goat Starvation: {goat.starve}, Cabbage Value: {cabbage.value}, " \
+               f"Goat Radius: {round(goat.radius, 2)}, Goat eat speed: {goat.eat_speed}"
@@ -0,0 +1,77 @@
+import argparse
+import csv
+import json
+import random
+from collections import deque
+
+from pen_model import Pen
+
+PHASES = ("nearest", "movement", "eating", "render")
+
+
+# Время по фазам тика: Pen.step и paintEvent добавляют время, end_tick закрывает строку трассы.
+# max_rows - сколько последних строк трассы хранить (None - все, для записи полной трассы)
+class PhaseProfiler(object):
+    def __init__(self, window=300, max_rows=None):
+        self.window = window
+        self.rolling = {phase: deque(maxlen=window) for phase in PHASES}
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.rows = deque(maxlen=max_rows)
+
+    def add(self, phase, seconds):
+        self.current[phase] += seconds
+
+    def end_tick(self, tick, goats, cabbages):
+        row = {"tick": tick, "goats": goats, "cabbages": cabbages}
+        for phase in PHASES:
+            milliseconds = self.current[phase] * 1000
+            self.rolling[phase].append(milliseconds)
+            row[f"{phase}_ms"] = round(milliseconds, 4)
+            self.current[phase] = 0.0
+        self.rows.append(row)
+
+    def percentiles(self, phase, levels=(50, 90, 99)):
+        values = sorted(self.rolling[phase])
+        if not values:
+            return [0.0 for _ in levels]
+        return [values[min(len(values) - 1, len(values) * level // 100)] for level in levels]
+
+    def summary_lines(self):
+        lines = [f"{'phase':<9}{'p50':>8}{'p90':>8}{'p99':>8}  ms, last {self.window} ticks"]
+        for phase in PHASES:
+            p50, p90, p99 = self.percentiles(phase)
+            lines.append(f"{phase:<9}{p50:>8.3f}{p90:>8.3f}{p99:>8.3f}")
+        return lines
+
+    def export(self, path):
+        if path.endswith(".json"):
+            with open(path, "w") as file:
+                json.dump(list(self.rows), file)
+            return
+        with open(path, "w", newline="") as file:
+            fields = ["tick", "goats", "cabbages"] + [f"{phase}_ms" for phase in PHASES]
+            writer = csv.DictWriter(file, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile a headless goat pen run")
+    parser.add_argument("--goats", type=int, default=100)
+    parser.add_argument("--cabbages", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="pen_trace.csv", help="trace file, .csv or .json")
+    args = parser.parse_args()
+
+    pen = Pen(cabbages=args.cabbages, goats=args.goats, rng=random.Random(args.seed))
+    pen.profiler = PhaseProfiler(window=args.ticks)
+    while pen.tick < args.ticks and pen.pen:
+        pen.step()
+        pen.profiler.end_tick(pen.tick, len(pen.pen), len(pen.cabbages))
+    pen.profiler.export(args.out)
+    print("\n".join(pen.profiler.summary_lines()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import argparse
+import time
+from multiprocessing import Array, Barrier, Process, shared_memory
+from threading import BrokenBarrierError
+
+import numpy as np
+
+# Колонки состояния в общей памяти. owner - номер шарда-владельца, -1 для мёртвой козы.
+GOAT_COLUMNS = ("x", "y", "starve", "speed", "endurance", "eating", "owner")
+CABBAGE_COLUMNS = ("x", "y", "value", "owner")
+CONTROL_COLUMNS = ("tick", "stop")
+
+FIELD = (150, 500)
+CHUNK = 1024
+
+
+def column_views(buffer, columns, capacity, offset=0):
+    return {name: np.ndarray((capacity,), dtype=np.float64, buffer=buffer, offset=offset + i * capacity * 8)
+            for i, name in enumerate(columns)}
+
+
+class SharedState(object):
+    def __init__(self, goats, cabbages, name=None):
+        self.goats_capacity = goats
+        self.cabbages_capacity = cabbages
+        size = 8 * (goats * len(GOAT_COLUMNS) + cabbages * len(CABBAGE_COLUMNS) + len(CONTROL_COLUMNS))
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        buffer = self.memory.buf
+        self.goats = column_views(buffer, GOAT_COLUMNS, goats)
+        offset = 8 * goats * len(GOAT_COLUMNS)
+        self.cabbages = column_views(buffer, CABBAGE_COLUMNS, cabbages, offset)
+        offset += 8 * cabbages * len(CABBAGE_COLUMNS)
+        self.control = np.ndarray((len(CONTROL_COLUMNS),), dtype=np.float64, buffer=buffer, offset=offset)
+
+    def close(self):
+        # Колонки козы, капусты и управления - представления поверх сегмента; пока они живы, close() падает с BufferError
+        self.goats = self.cabbages = self.control = None
+        self.memory.close()
+
+
+def strip_of(x_coords, edges):
+    return np.clip(np.searchsorted(edges, x_coords, side="right") - 1, 0, len(edges) - 2)
+
+
+# Фаза 1: свои козы идут к ближайшей живой капусте или едят её (капуста под козой всегда того же шарда)
+def move_and_eat(state, shard):
+    goats, cabbages = state.goats, state.cabbages
+    own = np.flatnonzero(goats["owner"] == shard)
+    if own.size == 0:
+        return
+    # Съеденные на этом тике кочаны (value == 0) остаются на месте до фазы 2,
+    # поэтому все шарды видят одни и те же координаты капусты
+    cabbage_x, cabbage_y = cabbages["x"], cabbages["y"]
+
+    for start in range(0, own.size, CHUNK):
+        index = own[start:start + CHUNK]
+        x, y = goats["x"][index], goats["y"][index]
+        delta_x = cabbage_x[None, :] - x[:, None]
+        delta_y = cabbage_y[None, :] - y[:, None]
+        squared = delta_x ** 2 + delta_y ** 2
+        nearest = squared.argmin(axis=1)
+        rows = np.arange(index.size)
+        distance = np.sqrt(squared[rows, nearest])
+        target_x, target_y = cabbage_x[nearest], cabbage_y[nearest]
+
+        starve = goats["starve"][index]
+        radius = np.abs(starve) ** 0.35
+        moving = distance != 0
+        snap = moving & (distance <= radius / 5)
+        walk = moving & ~snap
+        with np.errstate(invalid="ignore", divide="ignore"):
+            step = goats["speed"][index] / distance
+            walk_x = x + delta_x[rows, nearest] * step
+            walk_y = y + delta_y[rows, nearest] * step
+        goats["x"][index] = np.where(snap, target_x, np.where(walk, walk_x, x))
+        goats["y"][index] = np.where(snap, target_y, np.where(walk, walk_y, y))
+        goats["eating"][index] = np.where(moving, snap, goats["eating"][index])
+        goats["starve"][index] = np.where(moving, starve - goats["endurance"][index], starve)
+
+        # Едящих коз мало, их обрабатываем по одной в порядке индексов, как в Pen.step
+        for goat, cabbage in zip(index[~moving], nearest[~moving]):
+            starve = goats["starve"][goat]
+            eat_speed = 10 if starve > 700 else (800 - starve) // 10
+            value = cabbages["value"][cabbage]
+            if value > eat_speed:
+                cabbages["value"][cabbage] = value - eat_speed
+                goats["starve"][goat] = starve + eat_speed
+            elif value > 0:
+                goats["starve"][goat] = starve + value
+                cabbages["value"][cabbage] = 0
+
+
+# Фаза 2: свои съеденные кочаны вырастают заново, мёртвые козы убираются, пересёкшие границу передаются соседу
+def respawn_and_hand_off(state, shard, edges, rng):
+    goats, cabbages = state.goats, state.cabbages
+    own_cabbages = np.flatnonzero(cabbages["owner"] == shard)
+    finished = own_cabbages[cabbages["value"][own_cabbages] <= 0]
+    if finished.size:
+        cabbages["x"][finished] = rng.integers(FIELD[0], FIELD[1] + 1, finished.size)
+        cabbages["y"][finished] = rng.integers(FIELD[0], FIELD[1] + 1, finished.size)
+        cabbages["value"][finished] = rng.integers(200, 501, finished.size)
+        cabbages["owner"][finished] = strip_of(cabbages["x"][finished], edges)
+
+    own = np.flatnonzero(goats["owner"] == shard)
+    dead = own[goats["starve"][own] <= 0]
+    goats["owner"][dead] = -1
+    own = own[goats["starve"][own] > 0]
+    goats["owner"][own] = strip_of(goats["x"][own], edges)
+    return finished.size
+
+
+def worker(name, goats, cabbages, shard, edges, seed, barrier, counters):
+    state = SharedState(goats, cabbages, name)
+    rng = np.random.default_rng(seed + shard)
+    try:
+        while True:
+            barrier.wait()
+            if state.control[1]:
+                break
+            move_and_eat(state, shard)
+            barrier.wait()
+            counters[shard] += respawn_and_hand_off(state, shard, edges, rng)
+            barrier.wait()
+    except BrokenBarrierError:
+        pass  # главный процесс или другой шард сломал барьер - выходим
+    except BaseException:
+        # Ломаем барьер, чтобы остальные не ждали этот шард до таймаута
+        barrier.abort()
+        raise
+    finally:
+        state.close()
+
+
+# Один сценарий на несколько процессов: загон разбит на вертикальные полосы, каждой владеет свой процесс.
+# step() возвращается только после того, как все шарды закончили тик, поэтому между шагами
+# состояние в общей памяти согласовано и окно может читать его без блокировок.
+class ShardedPen(object):
+    def __init__(self, goats=1000, cabbages=200, shards=4, width=750, seed=0, timeout=30.0):
+        self.shards = shards
+        self.timeout = timeout  # Сколько ждать шарды на барьере, прежде чем считать их упавшими
+        self.edges = np.linspace(0, width, shards + 1)
+        self.state = SharedState(goats, cabbages)
+        rng = np.random.default_rng(seed)
+
+        goat_columns = self.state.goats
+        goat_columns["x"][:] = rng.integers(100, 501, goats)
+        goat_columns["y"][:] = rng.integers(100, 501, goats)
+        goat_columns["starve"][:] = 800
+        goat_columns["speed"][:] = rng.uniform(0.5, 0.8, goats)
+        goat_columns["endurance"][:] = rng.integers(2, 5, goats)
+        goat_columns["eating"][:] = 0
+        goat_columns["owner"][:] = strip_of(goat_columns["x"], self.edges)
+
+        cabbage_columns = self.state.cabbages
+        cabbage_columns["x"][:] = rng.integers(FIELD[0], FIELD[1] + 1, cabbages)
+        cabbage_columns["y"][:] = rng.integers(FIELD[0], FIELD[1] + 1, cabbages)
+        cabbage_columns["value"][:] = rng.integers(200, 501, cabbages)
+        cabbage_columns["owner"][:] = strip_of(cabbage_columns["x"], self.edges)
+        self.state.control[:] = 0
+
+        self.counters = Array("q", shards)
+        self.barrier = Barrier(shards + 1)
+        self.workers = [Process(target=worker, daemon=True,
+                                args=(self.state.memory.name, goats, cabbages, shard, self.edges, seed,
+                                      self.barrier, self.counters))
+                        for shard in range(shards)]
+        for process in self.workers:
+            process.start()
+
+    @property
+    def tick(self):
+        return int(self.state.control[0])
+
+    @property
+    def cabbages_eaten(self):
+        return sum(self.counters)
+
+    def wait(self):
+        try:
+            self.barrier.wait(self.timeout)
+        except BrokenBarrierError:
+            dead = [shard for shard, process in enumerate(self.workers) if not process.is_alive()]
+            if dead:
+                raise RuntimeError(f"shard workers {dead} stopped") from None
+            raise RuntimeError(f"shard workers did not reach the barrier in {self.timeout} s") from None
+
+    def step(self):
+        self.wait()
+        self.wait()
+        self.wait()
+        self.state.control[0] += 1
+
+    def snapshot(self):
+        goats, cabbages = self.state.goats, self.state.cabbages
+        alive = goats["owner"] >= 0
+        return {
+            "goat_x": goats["x"][alive].copy(),
+            "goat_y": goats["y"][alive].copy(),
+            "goat_starve": goats["starve"][alive].copy(),
+            "goat_shard": goats["owner"][alive].astype(np.int32),
+            "cabbage_x": cabbages["x"].copy(),
+            "cabbage_y": cabbages["y"].copy(),
+            "cabbage_value": cabbages["value"].copy(),
+        }
+
+    def alive(self):
+        return int(np.count_nonzero(self.state.goats["owner"] >= 0))
+
+    def close(self):
+        if self.state is None:
+            return
+        self.state.control[1] = 1
+        try:
+            self.wait()
+        except RuntimeError:
+            self.barrier.abort()
+        for process in self.workers:
+            process.join(self.timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        memory = self.state.memory
+        self.state.close()
+        memory.unlink()
+        self.state = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one large goat pen scenario across worker processes")
+    parser.add_argument("--goats", type=int, default=20000)
+    parser.add_argument("--cabbages", type=int, default=500)
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with ShardedPen(args.goats, args.cabbages, args.shards, seed=args.seed) as pen:
+        start = time.perf_counter()
+        while pen.tick < args.ticks and pen.alive():
+            pen.step()
+        elapsed = time.perf_counter() - start
+        print(f"{pen.tick} ticks in {elapsed:.2f} s ({elapsed / max(pen.tick, 1) * 1000:.1f} ms/tick), "
+              f"goats alive {pen.alive()}, cabbages eaten {pen.cabbages_eaten}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import json
+import struct
+import time
+
+import numpy as np
+
+from pen_model import Goat, Pen
+from pen_herd import HerdModel
+
+# Файл снимка: MAGIC, длина JSON-заголовка, заголовок, затем колонки, каждая выровнена на 64 байта.
+# Смещения в заголовке считаются от начала данных, поэтому колонки читаются через np.memmap без копирования.
+MAGIC = b"PENSNAP1"
+PREFIX = struct.Struct("<8sQ")
+ALIGN = 64
+
+GOAT_COLUMNS = {"x": "<f8", "y": "<f8", "starve": "<f8", "speed": "<f8", "endurance": "<f8", "eating": "|b1"}
+CABBAGE_COLUMNS = {"x": "<f8", "y": "<f8", "value": "<f8", "eaten": "|b1"}
+
+
+def aligned(size):
+    return (size + ALIGN - 1) // ALIGN * ALIGN
+
+
+def save_columns(path, goats, cabbages, meta=None):
+    columns = {}
+    arrays = []
+    offset = 0
+    for group, source, kinds in (("goats", goats, GOAT_COLUMNS), ("cabbages", cabbages, CABBAGE_COLUMNS)):
+        for name, dtype in kinds.items():
+            if name not in source:
+                continue
+            array = np.ascontiguousarray(source[name], dtype=dtype)
+            columns[f"{group}/{name}"] = {"dtype": dtype, "count": int(array.size), "offset": offset}
+            arrays.append((offset, array))
+            offset = aligned(offset + array.nbytes)
+
+    header = json.dumps({"meta": meta or {}, "columns": columns}).encode()
+    data_start = aligned(PREFIX.size + len(header))
+    with open(path, "wb") as file:
+        file.write(PREFIX.pack(MAGIC, len(header)))
+        file.write(header)
+        for column_offset, array in arrays:
+            file.seek(data_start + column_offset)
+            file.write(array.tobytes())
+        file.truncate(data_start + offset)
+
+
+# mode="c" - копирование при записи: модель может менять массивы, файл остаётся прежним
+def load_columns(path, mode="c"):
+    with open(path, "rb") as file:
+        magic, header_size = PREFIX.unpack(file.read(PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a pen snapshot")
+        header = json.loads(file.read(header_size))
+    data_start = aligned(PREFIX.size + header_size)
+
+    goats, cabbages = {}, {}
+    for key, column in header["columns"].items():
+        group, name = key.split("/")
+        target = goats if group == "goats" else cabbages
+        if column["count"] == 0:
+            target[name] = np.empty(0, dtype=column["dtype"])
+            continue
+        target[name] = np.memmap(path, dtype=column["dtype"], mode=mode, shape=(column["count"],),
+                                 offset=data_start + column["offset"])
+    return goats, cabbages, header["meta"]
+
+
+# Колонки загона с объектами Goat/Cabbage (для снимков и живого просмотра)
+def pen_columns(pen):
+    goats = {
+        "x": [goat.x_coord for goat in pen.pen],
+        "y": [goat.y_coord for goat in pen.pen],
+        "starve": [goat.starve for goat in pen.pen],
+        "speed": [goat.speed for goat in pen.pen],
+        "endurance": [goat.endurance for goat in pen.pen],
+        "eating": [goat.eating_status for goat in pen.pen],
+    }
+    cabbages = {
+        "x": [cabbage.x_coord for cabbage in pen.cabbages],
+        "y": [cabbage.y_coord for cabbage in pen.cabbages],
+        "value": [cabbage.value for cabbage in pen.cabbages],
+        "eaten": [cabbage.eaten_status for cabbage in pen.cabbages],
+    }
+    return goats, cabbages
+
+
+def save_pen(path, pen):
+    goats, cabbages = pen_columns(pen)
+    save_columns(path, goats, cabbages, {"tick": pen.tick, "cabbages_eaten": pen.cabbages_eaten})
+
+
+# Загон для окна строится из объектов Goat по одному на строку, поэтому без копирования грузится только
+# load_herd/load_columns; max_goats не даёт окну начать строить объекты для огромного снимка
+def load_pen(path, rng=None, max_goats=None):
+    goats, cabbages, meta = load_columns(path, mode="r")
+    if max_goats is not None and len(goats["x"]) > max_goats:
+        raise ValueError(f"{path} has {len(goats['x'])} goats, the window takes at most {max_goats}; "
+                         "run large snapshots headless with pen_herd.py --load")
+    pen = Pen(cabbages=0, goats=0, rng=rng)
+    pen.tick = meta.get("tick", 0)
+    pen.cabbages_eaten = meta.get("cabbages_eaten", 0)
+
+    # Для окна всё равно нужны объекты, но колонки превращаются в списки одним вызовом tolist()
+    goat_rows = zip(*(goats[name].tolist() for name in GOAT_COLUMNS))
+    for x, y, starve, speed, endurance, eating in goat_rows:
+        goat = Goat.__new__(Goat)
+        goat.x_coord, goat.y_coord, goat.starve = x, y, starve
+        goat.speed, goat.endurance, goat.eating_status = speed, endurance, eating
+        goat.animate_circles()
+        pen.pen.append(goat)
+    eaten = cabbages["eaten"].tolist() if "eaten" in cabbages else [False] * len(cabbages["x"])
+    for x, y, value, eaten_status in zip(cabbages["x"].tolist(), cabbages["y"].tolist(),
+                                         cabbages["value"].tolist(), eaten):
+        pen.cabbages.place(value, x, y).eaten_status = eaten_status
+    return pen
+
+
+def save_herd(path, herd):
+    save_columns(path, herd.goats, herd.cabbages, {"tick": herd.tick, "cabbages_eaten": herd.cabbages_eaten})
+
+
+def load_herd(path, seed=0, **options):
+    goats, cabbages, meta = load_columns(path, mode="c")
+    return HerdModel.from_columns(goats, cabbages, seed=seed, tick=meta.get("tick", 0),
+                                  cabbages_eaten=meta.get("cabbages_eaten", 0), **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or inspect goat pen snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    make = commands.add_parser("make", help="generate a random initial state")
+    make.add_argument("path")
+    make.add_argument("--goats", type=int, default=1000000)
+    make.add_argument("--cabbages", type=int, default=1000)
+    make.add_argument("--seed", type=int, default=0)
+    info = commands.add_parser("info", help="map a snapshot (no objects are built) and print its size")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "make":
+        save_herd(args.path, HerdModel(args.goats, args.cabbages, args.seed))
+    start = time.perf_counter()
+    herd = load_herd(args.path)
+    print(f"{len(herd)} goats, {herd.cabbages['x'].size} cabbages, tick {herd.tick}, "
+          f"loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import time
+from math import tau
+
+import numpy as np
+
+
+# Параметрические кривые: функция от массива t в [0, 2pi) возвращает массивы x, y
+def circle(x0, y0, radius):
+    return lambda t: (x0 + radius * np.cos(t), y0 + radius * np.sin(t))
+
+
+def ellipse(x0, y0, radius_x, radius_y):
+    return lambda t: (x0 + radius_x * np.cos(t), y0 + radius_y * np.sin(t))
+
+
+def lissajous(x0, y0, radius_x, radius_y, kx=3, ky=2, shift=0.0):
+    return lambda t: (x0 + radius_x * np.sin(kx * t + shift), y0 + radius_y * np.sin(ky * t))
+
+
+def rose(x0, y0, radius, k=4):
+    return lambda t: (x0 + radius * np.cos(k * t) * np.cos(t), y0 + radius * np.cos(k * t) * np.sin(t))
+
+
+# Таблицы положений на периоде для набора кривых: (кривые, samples), за последней точкой снова идёт первая.
+# Фаза - доля периода в [0, 1), между соседними точками таблицы - линейная интерполяция.
+class TrajectoryBank(object):
+    def __init__(self, curves, samples=360):
+        self.samples = samples
+        t = np.linspace(0, tau, samples, endpoint=False)
+        self.x = np.empty((len(curves), samples))
+        self.y = np.empty((len(curves), samples))
+        for row, curve in enumerate(curves):
+            self.x[row], self.y[row] = curve(t)
+
+    def positions(self, curve_ids, phases):
+        position = np.mod(phases, 1.0) * self.samples
+        # Для крошечной отрицательной фазы np.mod даёт ровно 1.0 после округления, отсюда ограничение индекса
+        index = np.minimum(position.astype(np.int64), self.samples - 1)
+        fraction = position - index
+        following = (index + 1) % self.samples
+        x = self.x[curve_ids, index] + (self.x[curve_ids, following] - self.x[curve_ids, index]) * fraction
+        y = self.y[curve_ids, index] + (self.y[curve_ids, following] - self.y[curve_ids, index]) * fraction
+        return x, y
+
+
+# Набор точек на кривых банка: фаза хранится по модулю 1, поэтому не растёт бесконечно, как угол
+class MarkerSet(object):
+    def __init__(self, bank, curve_ids, rates, phases=None):
+        self.bank = bank
+        self.curve_ids = np.asarray(curve_ids, dtype=np.int64)
+        self.rates = np.asarray(rates, dtype=np.float64)  # оборотов в секунду, знак задаёт направление
+        self.phases = np.zeros(self.curve_ids.size) if phases is None else np.mod(phases, 1.0)
+
+    def __len__(self):
+        return self.curve_ids.size
+
+    def advance(self, seconds):
+        self.phases = np.mod(self.phases + self.rates * seconds, 1.0)
+
+    def positions(self, ahead=0.0):
+        # ahead - секунды, прошедшие после последнего фиксированного шага (остаток накопителя планировщика)
+        return self.bank.positions(self.curve_ids, self.phases + self.rates * ahead)
+
+
+# Фиксированный шаг моделирования поверх root.after: сколько бы ни длился кадр,
+# состояние двигается шагами step секунд, а отрисовка получает остаток недошагнутого времени в секундах
+class FixedStepScheduler(object):
+    def __init__(self, root, step, update, render, frame_ms=16, max_lag=0.25):
+        self.root = root
+        self.step = step
+        self.update = update
+        self.render = render
+        self.frame_ms = frame_ms
+        self.max_lag = max_lag
+        self.accumulator = 0.0
+        self.last = None
+
+    def start(self):
+        self.last = time.perf_counter()
+        self.root.after(self.frame_ms, self.frame)
+
+    def frame(self):
+        now = time.perf_counter()
+        self.accumulator += min(now - self.last, self.max_lag)
+        self.last = now
+        while self.accumulator >= self.step:
+            self.update(self.step)
+            self.accumulator -= self.step
+        self.render(self.accumulator)
+        self.root.after(self.frame_ms, self.frame)
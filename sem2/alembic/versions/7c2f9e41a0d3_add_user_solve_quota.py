@@ -0,0 +1,43 @@
+"""Add user solve quota columns and solve leases
+
+Revision ID: 7c2f9e41a0d3
+Revises: 508b72d865e2
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2f9e41a0d3'
+down_revision: Union[str, None] = '508b72d865e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('cpu_tokens', sa.Float(), nullable=True))
+    op.add_column('users', sa.Column('tokens_updated_at', sa.DateTime(), nullable=True))
+    op.create_table('solve_leases',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_solve_leases_id'), 'solve_leases', ['id'], unique=False)
+    op.create_index(op.f('ix_solve_leases_user_id'), 'solve_leases', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_solve_leases_user_id'), table_name='solve_leases')
+    op.drop_index(op.f('ix_solve_leases_id'), table_name='solve_leases')
+    op.drop_table('solve_leases')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('tokens_updated_at')
+        batch_op.drop_column('cpu_tokens')
@@ -1,22 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, timedelta
-from jose import jwt, JWTError
 from typing import Optional
 from app.schemas.user import UserCreate, UserMe, UserLoginResponse
-from app.schemas.graph import Graph, PathResult
-from app.cruds.user import create_user, get_user_by_email, authenticate_user
-from app.services.aco import AntColonyOptimization
-from app.db.database import get_db
-from app.core.config import settings
-from passlib.context import CryptContext
+from app.schemas.graph import Graph, GraphDelta, PathResult
+from app.core.config import get_settings
+from app.api.responses import path_response
+
+# Тяжёлые зависимости (SQLAlchemy, passlib/bcrypt, python-jose, NumPy) импортируются внутри обработчиков,
+# чтобы импорт приложения был быстрым; повторный импорт модуля - это просто поиск в sys.modules
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# Сессия базы данных; SQLAlchemy загружается при первом запросе
+def get_db():
+    from app.db.database import get_db as database_session
+    yield from database_session()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    from jose import jwt
+    settings = get_settings()
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -26,7 +31,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)):
+    from jose import jwt, JWTError
+    from app.cruds.user import get_user_by_email
+    settings = get_settings()
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -45,7 +53,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     return user
 
 @router.post("/sign-up/", response_model=UserLoginResponse)
-def sign_up(user: UserCreate, db: Session = Depends(get_db)):
+def sign_up(user: UserCreate, db=Depends(get_db)):
+    from app.cruds.user import create_user, get_user_by_email
 
     # Проверяем, не зарегистрирован ли email
     db_user = get_user_by_email(db, email=user.email)
@@ -85,7 +94,8 @@ def sign_up(user: UserCreate, db: Session = Depends(get_db)):
 #     print("Returning response:", response)
 #     return response
 @router.post("/login/", response_model=UserLoginResponse)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_db)):
+    from app.cruds.user import authenticate_user
 
     # form_data.username(password): почта(пароль) пользователя, введённый в поле логина(пароля)
 
@@ -116,10 +126,34 @@ async def read_users_me(current_user: UserMe = Depends(get_current_user)):
     return current_user
 
 @router.post("/shortest-path/", response_model=PathResult)
-async def shortest_path(graph: Graph, current_user: UserMe = Depends(get_current_user)):
+async def shortest_path(graph: Graph, current_user: UserMe = Depends(get_current_user), db=Depends(get_db),
+                        accept: Optional[str] = Header(None)):
+    from app.services.admission import admission
+    from app.services.solutions import StoredSolution, get_solution_store
+    from app.services.solver_pool import get_solver_pool
     print("Received input:", graph)
-    aco = AntColonyOptimization(graph)
-    result = aco.run()
+    # Стоимость оценивается по размеру графа до запуска муравьёв: дорогие запросы ждут или отклоняются.
+    # Само решение идёт в пуле потоков, чтобы не останавливать цикл событий для остальных запросов
+    async with admission(db, current_user.id, len(graph.nodes), len(graph.edges), time_budget=graph.time_budget):
+        result, aco = await run_in_threadpool(get_solver_pool().solve, graph)
+    if result is None:
+        raise HTTPException(status_code=400, detail="No Hamiltonian path found")
+    # Запоминаем решение, чтобы следующие запросы с небольшими изменениями графа не решались с нуля
+    result.solution_id = get_solution_store().save(StoredSolution(current_user.id, graph, result.path, aco.pheromone))
+    return path_response(result, accept)
+
+@router.post("/shortest-path/{solution_id}/delta/", response_model=PathResult)
+async def shortest_path_delta(solution_id: str, delta: GraphDelta, current_user: UserMe = Depends(get_current_user),
+                              db=Depends(get_db), accept: Optional[str] = Header(None)):
+    from app.services.admission import admission
+    from app.services.solutions import get_solution_store, resolve
+    solution = get_solution_store().get(solution_id, current_user.id)
+    if solution is None:
+        raise HTTPException(status_code=404, detail="Solution not found")
+    num_nodes = len(solution.graph.nodes) + len(delta.add_nodes)
+    num_edges = len(solution.graph.edges) + len(delta.add_edges)
+    async with admission(db, current_user.id, num_nodes, num_edges, num_iterations=15, time_budget=delta.time_budget):
+        result = await run_in_threadpool(resolve, solution, delta, current_user.id)
     if result is None:
         raise HTTPException(status_code=400, detail="No Hamiltonian path found")
-    return result
+    return path_response(result, accept)
@@ -0,0 +1,67 @@
+import json
+from fastapi import Response
+from app.schemas.graph import PathResult
+
+# orjson необязателен: если его нет, JSON собирает стандартный модуль json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+def dump_json(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+# Качество (q) медиатипа по заголовку Accept: берётся самый конкретный подходящий диапазон
+# (type/subtype, затем type/*, затем */*), тип без подходящего диапазона имеет q = 0
+def media_quality(accept, media_type):
+    main_type = media_type.split("/")[0]
+    best = None
+    for media_range in accept.split(","):
+        name, *params = [part.strip() for part in media_range.split(";")]
+        name = name.lower()
+        if name == media_type:
+            specificity = 2
+        elif name == main_type + "/*":
+            specificity = 1
+        elif name == "*/*":
+            specificity = 0
+        else:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if best is None or specificity > best[0]:
+            best = (specificity, quality)
+    return best[1] if best else 0.0
+
+# Двоичный ответ только если клиент ставит его строго выше JSON; при равных q отвечаем JSON
+def wants_binary(accept):
+    if not accept:
+        return False
+    return media_quality(accept, BINARY_MEDIA_TYPE) > media_quality(accept, "application/json")
+
+# Ответ с путём без повторной проверки через response_model: результат уже собран решателем.
+# Accept: application/octet-stream - тело из меток пути (int64 little-endian), остальные поля в заголовках X-*;
+# иначе JSON с теми же полями, что у PathResult
+def path_response(result: PathResult, accept=None):
+    if wants_binary(accept):
+        import numpy as np
+        headers = {"X-Total-Distance": repr(result.total_distance), "X-Path-Length": str(len(result.path))}
+        if result.solution_id is not None:
+            headers["X-Solution-Id"] = result.solution_id
+        if result.stop_reason is not None:
+            headers["X-Stop-Reason"] = result.stop_reason
+        body = np.asarray(result.path, dtype="<i8").tobytes()
+        return Response(content=body, media_type=BINARY_MEDIA_TYPE, headers=headers)
+    payload = {"path": result.path, "total_distance": result.total_distance,
+               "solution_id": result.solution_id, "stop_reason": result.stop_reason}
+    return Response(content=dump_json(payload), media_type="application/json")
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 
 # Класс для хранения настроек
@@ -5,10 +6,27 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     DATABASE_URL: str = "sqlite:///app.db"  # Путь к базе данных SQLite
+    SOLVER_MEMORY_BUDGET: int = 256 * 1024 * 1024  # Байт на матрицы одной колонии муравьёв
+    SOLVER_WORKERS: int = 0  # Процессы для параллельных колоний (0 - решать в процессе API)
+    SOLUTION_STORE_MAX_BYTES: int = 256 * 1024 * 1024  # Сколько байт феромонов хранить для повторных решений
+    SOLVER_SECONDS_PER_STEP: float = 1e-6  # Оценка времени одного шага муравья (узел x кандидат)
+    USER_MAX_CONCURRENT_SOLVES: int = 2  # Сколько решений один пользователь может запускать одновременно
+    USER_CPU_SECONDS_BURST: float = 30.0  # Размер корзины CPU-секунд пользователя
+    USER_CPU_SECONDS_PER_MINUTE: float = 10.0  # Скорость пополнения корзины
+    ADMISSION_QUEUE_SECONDS: float = 5.0  # Сколько запрос может ждать допуска, прежде чем получит 429
+    SOLVE_LEASE_SECONDS: float = 600.0  # Через сколько незавершённое решение считается брошенным
 
     class Config:
         env_file = ".env"  # Загружаем переменные из .env
         env_file_encoding = "utf-8"
 
-# Создаём объект настроек
-settings = Settings()
\ No newline at end of file
+# Настройки создаются (и .env читается) при первом обращении, а не при импорте модуля
+@lru_cache
+def get_settings():
+    return Settings()
+
+# Старое имя settings для кода, который импортирует его напрямую
+def __getattr__(name):
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -1,20 +1,33 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.core.config import settings
+from functools import lru_cache
+from app.core.config import get_settings
 
-# Создаём подключение к базе данных SQLite
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
+# Подключение к базе данных SQLite создаётся при первом запросе к ней
+@lru_cache
+def get_engine():
+    return create_engine(get_settings().DATABASE_URL, connect_args={"check_same_thread": False})
 
-# Создаём сессию для работы с базой данных
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Фабрика сессий для работы с базой данных
+@lru_cache
+def get_sessionmaker():
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+# Старые имена engine и SessionLocal для кода, который импортирует их напрямую
+def __getattr__(name):
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Базовый класс для моделей SQLAlchemy
 Base = declarative_base()
 
 # Функция для получения сессии базы данных
 def get_db():
-    db = SessionLocal()
+    db = get_sessionmaker()()
     try:
         yield db
     finally:
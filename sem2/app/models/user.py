@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String
 from app.db.database import Base
 
 # Модель пользователя для базы данных
@@ -7,4 +7,16 @@ class User(Base):
 
     id = Column(Integer, primary_key=True, index=True)  # Уникальный идентификатор
     email = Column(String, unique=True, index=True)  # Email, должен быть уникальным
-    hashed_password = Column(String)  # Хэшированный пароль
\ No newline at end of file
+    hashed_password = Column(String)  # Хэшированный пароль
+    # Допуск к решению задач: запас CPU-секунд (корзина токенов)
+    cpu_tokens = Column(Float, nullable=True)  # None - корзина ещё полная
+    tokens_updated_at = Column(DateTime, nullable=True)  # Когда запас пересчитывался последний раз
+
+# Решение, которое сейчас идёт у пользователя. Если процесс API убит посреди решения, запись остаётся,
+# поэтому записи старше SOLVE_LEASE_SECONDS считаются брошенными и не занимают слот
+class SolveLease(Base):
+    __tablename__ = "solve_leases"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    started_at = Column(DateTime, nullable=False)
\ No newline at end of file
@@ -1,10 +1,27 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
-class Graph(BaseModel):
+# Ограничения решения из запроса: бюджет времени в секундах, достаточная длина пути и
+# число итераций без улучшения. Решатель останавливается по первому сработавшему.
+# Нулевой или отрицательный бюджет и stagnation_limit меньше 1 отклоняются с 422
+class SolveLimits(BaseModel):
+    time_budget: Optional[float] = Field(None, gt=0)
+    target_distance: Optional[float] = None
+    stagnation_limit: Optional[int] = Field(None, ge=1)
+
+class Graph(SolveLimits):
     nodes: List[int]
     edges: List[List[int]]
 
 class PathResult(BaseModel):
     path: List[int]
-    total_distance: float
\ No newline at end of file
+    total_distance: float
+    solution_id: Optional[str] = None
+    stop_reason: Optional[str] = None  # optimal, target_distance, time_budget, stagnation, iterations или repaired
+
+# Изменения графа относительно прошлого решения; рёбра здесь задаются метками узлов, а не их номерами
+class GraphDelta(SolveLimits):
+    add_nodes: List[int] = []
+    remove_nodes: List[int] = []
+    add_edges: List[List[int]] = []
+    remove_edges: List[List[int]] = []
\ No newline at end of file
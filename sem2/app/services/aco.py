@@ -1,20 +1,92 @@
+import time
+
 import numpy as np
 from app.schemas.graph import Graph, PathResult
 
+# Выбор хранения под бюджет памяти (байт на одну колонию): плотные матрицы расстояний и феромонов в float64,
+# затем в float32, а если и они не помещаются - только списки соседей и феромоны на рёбрах
+def plan_storage(num_cities, memory_budget=None):
+    if memory_budget is None:
+        return np.float64, True
+    for dtype in (np.float64, np.float32):
+        if 2 * num_cities * num_cities * np.dtype(dtype).itemsize <= memory_budget:
+            return dtype, True
+    return np.float32, False
+
 # Класс для реализации алгоритма муравьиной колонии (ACO) для поиска кратчайшего пути
 class AntColonyOptimization:
-    # Инициализация с графом, количеством муравьёв и итераций
-    def __init__(self, graph: Graph):
+    # Инициализация с графом, количеством муравьёв и итераций.
+    # arrays - готовые массивы только для чтения (shared_arrays() другой колонии на том же графе),
+    # allocate(name, shape, dtype) - где создать большие массивы (по умолчанию обычная память процесса)
+    def __init__(self, graph: Graph, pheromone=None, num_iterations=50, max_candidates=32,
+                 memory_budget=None, arrays=None, allocate=None):
         self.graph = graph  # Граф с узлами и рёбрами
+        self.labels = np.asarray(graph.nodes)  # Метки узлов: путь из индексов переводится в метки одной выборкой
         self.num_cities = len(graph.nodes)  # Количество узлов (городов)
-        self.distance_matrix = self.create_distance_matrix()  # Матрица расстояний между узлами
+        self.dtype, self.dense = plan_storage(self.num_cities, memory_budget)
+        # Номера узлов в списках соседей: int16, если экономим память и номера помещаются
+        compact = memory_budget is not None and self.num_cities <= np.iinfo(np.int16).max
+        self.index_dtype = np.int16 if compact else np.int32
+        # Без матрицы расстояний списки соседей должны быть полными: по ним считаются строки матрицы
+        self.max_candidates = max_candidates if self.dense else self.num_cities
+        self.allocate = allocate or (lambda name, shape, dtype: np.empty(shape, dtype=dtype))
+        if arrays is None:
+            arrays = self.create_arrays()
+        self.distance_matrix = arrays.get("distance_matrix")  # Матрица расстояний между узлами (None без неё)
+        self.candidates = arrays["candidates"]
+        self.candidate_start = arrays["candidate_start"]
+        self.degree = arrays["degree"]
+        self.edge_keys = arrays.get("edge_keys")
+        # Все рёбра одной длины: среди соседей не нужно искать ближайших
+        self.unit_weights = not self.dense or bool(np.all(self.distance_matrix[np.isfinite(self.distance_matrix)] <= 1))
         self.num_ants = 10  # Количество муравьёв
-        self.num_iterations = 50  # Количество итераций алгоритма
+        self.num_iterations = num_iterations  # Количество итераций алгоритма (без бюджета времени)
+        # Ограничения из запроса: бюджет времени в секундах (снимает ограничение на число итераций),
+        # достаточная длина пути и число итераций без улучшения, после которого поиск прекращается
+        self.time_budget = graph.time_budget
+        self.target_distance = graph.target_distance
+        self.stagnation_limit = graph.stagnation_limit
+        self.stop_reason = None  # Почему остановился run()
+        self.alpha = 1  # Влияние феромона на выбор следующего узла
+        self.evaporation = 0.5  # Коэффициент испарения феромона
+        self.quantity = 100  # Количество феромона, которое откладывается на лучшем маршруте
+        # Феромоны: матрица n x n или, без плотных матриц, по значению на каждый элемент candidates.
+        # При повторном решении похожего графа передаются из прошлого решения
+        if pheromone is not None:
+            self.pheromone = np.asarray(pheromone, dtype=self.dtype)
+        elif self.dense:
+            self.pheromone = np.ones((self.num_cities, self.num_cities), dtype=self.dtype)
+        else:
+            self.pheromone = np.ones(self.candidates.size, dtype=self.dtype)
+        self.best_route = None  # Лучший маршрут в индексах узлов после run()
+
+    # Массивы, которые не меняются во время решения и могут быть общими для нескольких колоний
+    def create_arrays(self):
+        arrays = {}
+        if self.dense:
+            self.distance_matrix = arrays["distance_matrix"] = self.create_distance_matrix()
+        else:
+            self.distance_matrix = None
+        arrays["candidates"], arrays["candidate_start"], arrays["degree"] = self.create_candidate_lists()
+        if not self.dense:
+            # Ключи рёбер (узел * n + сосед) отсортированы вместе с candidates: по ним ищется место феромона
+            rows = np.repeat(np.arange(self.num_cities, dtype=np.int64), np.diff(arrays["candidate_start"]))
+            arrays["edge_keys"] = rows * self.num_cities + arrays["candidates"]
+        return arrays
+
+    def shared_arrays(self):
+        arrays = {"candidates": self.candidates, "candidate_start": self.candidate_start, "degree": self.degree}
+        if self.distance_matrix is not None:
+            arrays["distance_matrix"] = self.distance_matrix
+        if self.edge_keys is not None:
+            arrays["edge_keys"] = self.edge_keys
+        return arrays
 
     # Создание матрицы расстояний на основе рёбер графа
     def create_distance_matrix(self):
         # Создаём матрицу, заполненную бесконечностями
-        matrix = np.full((self.num_cities, self.num_cities), np.inf)
+        matrix = self.allocate("distance_matrix", (self.num_cities, self.num_cities), self.dtype)
+        matrix[...] = np.inf
         # Для каждого ребра устанавливаем расстояние 1 (неориентированный граф)
         for edge in self.graph.edges:
             i, j = edge  # Ребро между узлами i и j
@@ -24,51 +96,160 @@ class AntColonyOptimization:
         np.fill_diagonal(matrix, 0)
         return matrix
 
+    # Строка матрицы расстояний; без плотной матрицы считается по списку соседей
+    def distance_row(self, city):
+        if self.distance_matrix is not None:
+            return self.distance_matrix[city]
+        row = np.full(self.num_cities, np.inf, dtype=self.dtype)
+        row[self.candidates[self.candidate_start[city]:self.candidate_start[city + 1]]] = 1
+        row[city] = 0
+        return row
+
+    # Списки кандидатов: для каждого узла до max_candidates ближайших соседей (в разреженном графе - все соседи).
+    # Соседи узла i - candidates[candidate_start[i]:candidate_start[i + 1]], degree - полная степень узла
+    def create_candidate_lists(self):
+        edges = np.asarray(self.graph.edges, dtype=np.int32).reshape(-1, 2) - 1
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        pairs = np.unique(np.concatenate([edges, edges[:, ::-1]]), axis=0)
+        if self.distance_matrix is not None:
+            # Внутри узла соседи упорядочены по расстоянию, при равных - по номеру
+            order = np.lexsort((pairs[:, 1], self.distance_matrix[pairs[:, 0], pairs[:, 1]], pairs[:, 0]))
+            pairs = pairs[order]
+        degree = np.bincount(pairs[:, 0], minlength=self.num_cities).astype(np.int32)
+        first = np.concatenate(([0], np.cumsum(degree)[:-1]))
+        keep = np.arange(len(pairs)) - first[pairs[:, 0]] < self.max_candidates
+        candidate_start = np.zeros(self.num_cities + 1, dtype=np.int32)
+        candidate_start[1:] = np.cumsum(np.minimum(degree, self.max_candidates))
+        return pairs[keep, 1].astype(self.index_dtype), candidate_start, degree
+
+    # Соседи узла: список кандидатов, а если он обрезан - полный просмотр строки матрицы
+    def neighbours(self, city):
+        if self.degree[city] > self.max_candidates:
+            row = self.distance_row(city)
+            return np.flatnonzero(np.isfinite(row) & (np.arange(self.num_cities) != city))
+        return self.candidates[self.candidate_start[city]:self.candidate_start[city + 1]]
+
+    # Ближайшие непосещённые узлы: сначала среди кандидатов, полный просмотр - только если кандидаты кончились
+    def next_candidates(self, current, visited):
+        candidates = self.candidates[self.candidate_start[current]:self.candidate_start[current + 1]]
+        candidates = candidates[~visited[candidates]]
+        if candidates.size == 0 and self.degree[current] > self.max_candidates:
+            candidates = np.flatnonzero(~visited & np.isfinite(self.distance_row(current)))
+        if candidates.size > 1 and not self.unit_weights:
+            distances = self.distance_row(current)[candidates]
+            candidates = candidates[distances == distances.min()]
+        return candidates
+
+    # Быстрая проверка по степеням: при изолированном узле или больше чем двух тупиках пути точно нет
+    def feasible(self):
+        if self.num_cities <= 1:
+            return True
+        return not np.any(self.degree == 0) and np.count_nonzero(self.degree == 1) <= 2
+
+    # Место рёбер (from_cities -> to_cities) в массиве феромонов без плотной матрицы
+    def edge_slots(self, from_cities, to_cities):
+        keys = np.asarray(from_cities, dtype=np.int64) * self.num_cities + np.asarray(to_cities, dtype=np.int64)
+        return np.searchsorted(self.edge_keys, keys)
+
+    # Феромоны на рёбрах от узла current к candidates
+    def pheromone_of(self, current, candidates):
+        if self.dense:
+            return self.pheromone[current, candidates]
+        return self.pheromone[self.edge_slots(np.full(candidates.size, current), candidates)]
+
+    # Испарение феромона и откладывание его на рёбрах маршрута (в обе стороны, граф неориентированный)
+    def deposit(self, route, distance):
+        self.pheromone *= (1 - self.evaporation)
+        if not self.dense:
+            route = np.asarray(route)
+            for slots in (self.edge_slots(route[:-1], route[1:]), self.edge_slots(route[1:], route[:-1])):
+                self.pheromone[slots] += self.quantity / distance
+            return
+        for i in range(len(route) - 1):
+            self.pheromone[route[i], route[i + 1]] += self.quantity / distance
+            self.pheromone[route[i + 1], route[i]] += self.quantity / distance
+
+    # Причина остановки после очередной итерации или None, если поиск продолжается
+    def check_stop(self, iteration, last_improvement, best_distance, start):
+        if self.target_distance is not None and best_distance <= self.target_distance:
+            return "target_distance"
+        # Все рёбра длины 1, поэтому гамильтонов путь короче числа узлов не бывает
+        if best_distance <= self.num_cities:
+            return "optimal"
+        if self.time_budget is not None and time.perf_counter() - start >= self.time_budget:
+            return "time_budget"
+        if self.stagnation_limit is not None and iteration - last_improvement >= self.stagnation_limit:
+            return "stagnation"
+        if self.time_budget is None and iteration >= self.num_iterations:
+            return "iterations"
+        return None
+
     # Запуск алгоритма для поиска кратчайшего гамильтонова пути
     def run(self):
         best_route = None  # Лучший найденный маршрут
         best_distance = float('inf')  # Лучшее найденное расстояние (минимизируем)
 
-        # Выполняем заданное количество итераций
-        for _ in range(self.num_iterations):
+        # Если по степеням узлов пути нет, муравьев не запускаем
+        self.stop_reason = None
+        if not self.feasible():
+            self.stop_reason = "infeasible"
+            return None
+
+        start = time.perf_counter()
+        iteration = 0
+        last_improvement = 0  # Итерация, на которой лучший путь улучшился последний раз
+        # Итерации идут, пока не сработает одно из ограничений
+        while self.stop_reason is None:
             # Для каждого муравья строим маршрут
             for _ in range(self.num_ants):
+                # На большом графе одна итерация может быть долгой, поэтому время проверяется и между муравьями
+                if self.time_budget is not None and time.perf_counter() - start >= self.time_budget:
+                    break
                 # Начинаем с случайного узла
                 route = [np.random.randint(self.num_cities)]
-                # Множество непосещённых узлов
-                unvisited = set(range(self.num_cities)) - {route[0]}
+                # Отметки посещённых узлов
+                visited = np.zeros(self.num_cities, dtype=bool)
+                visited[route[0]] = True
 
                 # Пока есть непосещённые узлы
-                while unvisited:
+                while len(route) < self.num_cities:
                     current = route[-1]  # Текущий узел
-                    next_city = None  # Следующий узел
-                    min_dist = float('inf')  # Минимальное расстояние
-
-                    # Ищем ближайший непосещённый узел
-                    for city in unvisited:
-                        if self.distance_matrix[current, city] < min_dist:
-                            min_dist = self.distance_matrix[current, city]
-                            next_city = city
+                    candidates = self.next_candidates(current, visited)  # Ближайшие непосещённые узлы
 
                     # Если следующий узел не найден, прерываем
-                    if next_city is None:
+                    if candidates.size == 0:
                         break
-                    # Добавляем узел в маршрут и убираем из непосещённых
+                    # Среди равноудалённых узлов выбираем с вероятностью, пропорциональной феромону
+                    if candidates.size == 1:
+                        next_city = int(candidates[0])
+                    else:
+                        weights = np.cumsum(self.pheromone_of(current, candidates) ** self.alpha)
+                        choice = np.searchsorted(weights, np.random.random() * weights[-1], side='right')
+                        next_city = int(candidates[min(choice, candidates.size - 1)])
+                    # Добавляем узел в маршрут и отмечаем посещённым
                     route.append(next_city)
-                    unvisited.remove(next_city)
+                    visited[next_city] = True
 
                 # Проверяем, что маршрут полный (все узлы посещены)
-                if len(unvisited) == 0 and len(set(route)) == self.num_cities:
+                if len(route) == self.num_cities:
                     route_distance = len(route)  # Длина маршрута
                     # Если маршрут короче лучшего, обновляем лучший
                     if route_distance < best_distance:
                         best_distance = route_distance
                         best_route = route
+                        last_improvement = iteration + 1
+
+            # Испарение феромона и усиление лучшего найденного маршрута
+            if best_route:
+                self.deposit(best_route, best_distance)
+            iteration += 1
+            self.stop_reason = self.check_stop(iteration, last_improvement, best_distance, start)
 
+        self.best_route = best_route
         # Если маршрут найден, возвращаем результат
         if best_route:
             # Преобразуем индексы узлов в их значения из графа
-            path = [self.graph.nodes[i] for i in best_route]
-            return PathResult(path=path, total_distance=float(best_distance))
+            path = self.labels[best_route].tolist()
+            return PathResult(path=path, total_distance=float(best_distance), stop_reason=self.stop_reason)
         else:
             return None  # Если путь не найден, возвращаем None
\ No newline at end of file
@@ -0,0 +1,95 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.models.user import SolveLease, User
+
+# Оценка стоимости решения в CPU-секундах по размеру графа, до создания AntColonyOptimization:
+# итерации x муравьи x узлы x (средняя степень, но не больше списка кандидатов).
+# С бюджетом времени решатель работает не дольше него, он и есть оценка.
+# С SOLVER_WORKERS рабочими процессами колонию решает каждый из них, и CPU тратится во столько же раз больше
+def estimate_cost(num_nodes, num_edges, num_iterations=50, num_ants=10, max_candidates=32, time_budget=None):
+    if time_budget is not None:
+        seconds = max(time_budget, 0.0)
+    else:
+        degree = min(2 * num_edges / max(num_nodes, 1), max_candidates) + 1
+        seconds = num_iterations * num_ants * num_nodes * degree * get_settings().SOLVER_SECONDS_PER_STEP
+    return seconds * solver_processes()
+
+def solver_processes():
+    return max(1, get_settings().SOLVER_WORKERS)
+
+# Запас CPU-секунд пользователя на момент now с учётом пополнения
+def available_tokens(user: User, now):
+    if user.cpu_tokens is None or user.tokens_updated_at is None:
+        return get_settings().USER_CPU_SECONDS_BURST
+    refill = (now - user.tokens_updated_at).total_seconds() * get_settings().USER_CPU_SECONDS_PER_MINUTE / 60
+    return min(get_settings().USER_CPU_SECONDS_BURST, user.cpu_tokens + refill)
+
+# Одна попытка допуска. Возвращает (lease_id, None), если допущен (аренда слота записана, запас обновлён),
+# иначе (None, сколько секунд стоит подождать)
+def try_admit(db: Session, user_id, cost):
+    now = datetime.utcnow()
+    # Аренды, которые не вернул убитый процесс, истекают и не держат слоты вечно
+    stale = now - timedelta(seconds=get_settings().SOLVE_LEASE_SECONDS)
+    db.query(SolveLease).filter(SolveLease.user_id == user_id, SolveLease.started_at < stale).delete(
+        synchronize_session=False)
+    db.commit()
+    user = db.query(User).filter(User.id == user_id).populate_existing().first()
+    if db.query(SolveLease).filter(SolveLease.user_id == user_id).count() >= get_settings().USER_MAX_CONCURRENT_SOLVES:
+        return None, 1.0
+    tokens = available_tokens(user, now)
+    if tokens < cost:
+        return None, (cost - tokens) * 60 / get_settings().USER_CPU_SECONDS_PER_MINUTE
+    # Обновляем, только если строку никто не поменял после чтения, иначе пробуем снова;
+    # tokens_updated_at меняется при каждом допуске, поэтому два допуска одного пользователя не пройдут вместе
+    updated = db.query(User).filter(
+        User.id == user_id,
+        User.tokens_updated_at == user.tokens_updated_at,
+    ).update({User.cpu_tokens: tokens - cost, User.tokens_updated_at: now}, synchronize_session=False)
+    if not updated:
+        db.rollback()
+        return None, 0.0
+    lease = SolveLease(user_id=user_id, started_at=now)
+    db.add(lease)
+    db.commit()
+    return lease.id, None
+
+# Возврат слота; разница между оценкой и фактическим временем возвращается в корзину (или списывается)
+def release(db: Session, user_id, lease_id, cost, elapsed):
+    db.query(SolveLease).filter(SolveLease.id == lease_id).delete(synchronize_session=False)
+    db.query(User).filter(User.id == user_id).update(
+        {User.cpu_tokens: User.cpu_tokens + (cost - elapsed * solver_processes())}, synchronize_session=False)
+    db.commit()
+
+def too_many_requests(wait):
+    return HTTPException(status_code=429, detail="Solve quota exceeded, retry later",
+                         headers={"Retry-After": str(max(1, math.ceil(wait)))})
+
+# Допуск к решению: запрос дороже всей корзины отклоняется сразу (413), при нехватке слотов или запаса
+# запрос ждёт в очереди до ADMISSION_QUEUE_SECONDS, если ждать дольше - 429 с Retry-After
+@asynccontextmanager
+async def admission(db: Session, user_id, num_nodes, num_edges, num_iterations=50, time_budget=None):
+    cost = estimate_cost(num_nodes, num_edges, num_iterations, time_budget=time_budget)
+    if cost > get_settings().USER_CPU_SECONDS_BURST:
+        raise HTTPException(status_code=413, detail="Graph is too large to solve")
+    deadline = time.monotonic() + get_settings().ADMISSION_QUEUE_SECONDS
+    while True:
+        lease_id, wait = try_admit(db, user_id, cost)
+        if lease_id is not None:
+            break
+        left = deadline - time.monotonic()
+        if wait > left:
+            raise too_many_requests(wait)
+        await asyncio.sleep(min(max(wait, 0.05), left))
+
+    start = time.perf_counter()
+    try:
+        yield cost
+    finally:
+        release(db, user_id, lease_id, cost, time.perf_counter() - start)
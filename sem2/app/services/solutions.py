@@ -0,0 +1,167 @@
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+
+import numpy as np
+from app.schemas.graph import Graph, GraphDelta, PathResult
+from app.core.config import get_settings
+from app.services.aco import AntColonyOptimization, plan_storage
+
+# Прошлое решение: граф, найденный путь (метки узлов) и феромоны для тёплого старта.
+# Феромоны хранятся в float32, для тёплого старта точности хватает; None - без тёплого старта
+class StoredSolution:
+    def __init__(self, owner_id, graph: Graph, path, pheromone):
+        self.owner_id = owner_id
+        self.graph = graph
+        self.path = path
+        # Феромоны на рёбрах (решатель без плотных матриц) при повторном решении не переносятся - не храним их
+        if pheromone is not None and np.ndim(pheromone) != 2:
+            pheromone = None
+        self.pheromone = None if pheromone is None else np.asarray(pheromone, dtype=np.float32)
+
+    @property
+    def nbytes(self):
+        return 0 if self.pheromone is None else self.pheromone.nbytes
+
+# Хранилище последних решений в памяти процесса: старые вытесняются, когда решений больше max_size
+# или их феромоны вместе занимают больше max_bytes. Феромоны больше всего лимита не сохраняются
+class SolutionStore:
+    def __init__(self, max_size=256, max_bytes=None):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.bytes = 0
+        self.lock = Lock()
+
+    def save(self, solution: StoredSolution):
+        solution_id = uuid.uuid4().hex
+        if self.max_bytes is not None and solution.nbytes > self.max_bytes:
+            solution.pheromone = None
+        with self.lock:
+            self.items[solution_id] = solution
+            self.bytes += solution.nbytes
+            while len(self.items) > self.max_size or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                _, evicted = self.items.popitem(last=False)
+                self.bytes -= evicted.nbytes
+        return solution_id
+
+    def get(self, solution_id, owner_id):
+        with self.lock:
+            solution = self.items.get(solution_id)
+            if solution is None or solution.owner_id != owner_id:
+                return None
+            self.items.move_to_end(solution_id)
+            return solution
+
+@lru_cache
+def get_solution_store():
+    return SolutionStore(max_bytes=get_settings().SOLUTION_STORE_MAX_BYTES)
+
+# Рёбра графа в виде пар меток (в Graph рёбра заданы номерами узлов с 1)
+def label_edges(graph: Graph):
+    return {frozenset((graph.nodes[i - 1], graph.nodes[j - 1])) for i, j in graph.edges}
+
+# Применение изменений к графу: результат - новый Graph с перенумерованными рёбрами
+def apply_delta(graph: Graph, delta: GraphDelta):
+    removed = set(delta.remove_nodes)
+    nodes = [node for node in graph.nodes if node not in removed]
+    nodes += [node for node in delta.add_nodes if node not in nodes]
+    edges = label_edges(graph) - {frozenset(edge) for edge in delta.remove_edges}
+    edges |= {frozenset(edge) for edge in delta.add_edges}
+
+    position = {node: index + 1 for index, node in enumerate(nodes)}
+    new_edges = []
+    for edge in edges:
+        if len(edge) != 2:
+            continue  # петли не нужны гамильтонову пути
+        a, b = tuple(edge)
+        if a in position and b in position:
+            new_edges.append(sorted([position[a], position[b]]))
+    return Graph(nodes=nodes, edges=sorted(new_edges), time_budget=delta.time_budget,
+                 target_distance=delta.target_distance, stagnation_limit=delta.stagnation_limit)
+
+# Перенос феромонов на новый граф: для оставшихся узлов значения сохраняются, новым узлам - единицы
+def map_pheromone(old_graph: Graph, pheromone, new_graph: Graph):
+    old_index = {node: index for index, node in enumerate(old_graph.nodes)}
+    mapped = np.ones((len(new_graph.nodes), len(new_graph.nodes)))
+    kept_new = [index for index, node in enumerate(new_graph.nodes) if node in old_index]
+    kept_old = [old_index[new_graph.nodes[index]] for index in kept_new]
+    if kept_new:
+        mapped[np.ix_(kept_new, kept_new)] = pheromone[np.ix_(kept_old, kept_old)]
+    return mapped
+
+# Локальная починка старого пути: выкидываем удалённые узлы, режем путь на целые куски по удалённым рёбрам
+# и сшиваем куски и новые узлы, пока хватает рёбер. Соседи берутся из списков кандидатов решателя. Если не получилось - None
+def repair_path(path, graph: Graph, aco: AntColonyOptimization):
+    index = {node: i for i, node in enumerate(graph.nodes)}
+    neighbours = [set(aco.neighbours(i).tolist()) for i in range(aco.num_cities)]
+
+    kept = [index[node] for node in path if node in index]
+    pieces = []
+    for city in kept:
+        if pieces and city in neighbours[pieces[-1][-1]]:
+            pieces[-1].append(city)
+        else:
+            pieces.append([city])
+    in_path = set(kept)
+    pieces += [[city] for city in range(aco.num_cities) if city not in in_path]
+    if not pieces:
+        return None
+
+    result = pieces.pop(0)
+    while pieces:
+        for k, piece in enumerate(pieces):
+            if piece[0] in neighbours[result[-1]]:
+                result = result + piece
+            elif piece[-1] in neighbours[result[-1]]:
+                result = result + piece[::-1]
+            elif piece[-1] in neighbours[result[0]]:
+                result = piece + result
+            elif piece[0] in neighbours[result[0]]:
+                result = piece[::-1] + result
+            elif len(piece) == 1 and insertion_spot(result, piece[0], neighbours) is not None:
+                spot = insertion_spot(result, piece[0], neighbours)
+                result = result[:spot] + piece + result[spot:]
+            else:
+                continue
+            pieces.pop(k)
+            break
+        else:
+            return None
+    return result
+
+# Куда вставить одиночный узел между двумя соседями пути
+def insertion_spot(path, city, neighbours):
+    for i in range(len(path) - 1):
+        if path[i] in neighbours[city] and path[i + 1] in neighbours[city]:
+            return i + 1
+    return None
+
+# Повторное решение после небольших изменений: сначала починка старого пути,
+# если не вышло - муравьи с феромонами прошлого решения и меньшим числом итераций
+def resolve(solution: StoredSolution, delta: GraphDelta, owner_id, warm_iterations=15):
+    graph = apply_delta(solution.graph, delta)
+    # Феромоны переносятся только между плотными матрицами; без них колония стартует с единиц
+    memory_budget = get_settings().SOLVER_MEMORY_BUDGET
+    _, dense = plan_storage(len(graph.nodes), memory_budget)
+    pheromone = None
+    if dense and solution.pheromone is not None:
+        pheromone = map_pheromone(solution.graph, solution.pheromone, graph)
+    aco = AntColonyOptimization(graph, pheromone=pheromone, num_iterations=warm_iterations,
+                                memory_budget=memory_budget)
+
+    if not aco.feasible():
+        return None
+    route = repair_path(solution.path, graph, aco)
+    if route is not None:
+        aco.deposit(route, len(route))
+        path = aco.labels[route].tolist()
+        result = PathResult(path=path, total_distance=float(len(path)), stop_reason="repaired")
+    else:
+        result = aco.run()
+        if result is None:
+            return None
+
+    result.solution_id = get_solution_store().save(StoredSolution(owner_id, graph, result.path, aco.pheromone))
+    return result
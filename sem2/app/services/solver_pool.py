@@ -0,0 +1,156 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+from app.core.config import get_settings
+from app.schemas.graph import Graph
+from app.services.aco import AntColonyOptimization
+
+# Массивы только для чтения в общей памяти: рабочие процессы подключаются к ним по имени без копий.
+# Матрица расстояний создаётся сразу здесь через allocate, остальные (размером с число рёбер) копируются share()
+class SharedArrays:
+    def __init__(self):
+        self.segments = []
+        self.specs = {}
+
+    def allocate(self, name, shape, dtype):
+        dtype = np.dtype(dtype)
+        segment = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+        self.segments.append(segment)
+        self.specs[name] = (segment.name, shape, dtype.str)
+        return np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+    def share(self, arrays):
+        for name, array in arrays.items():
+            if name not in self.specs:
+                self.allocate(name, array.shape, array.dtype)[...] = array
+        return self.specs
+
+    # Сегмент нельзя закрыть, пока на его буфер есть numpy-представления: колония, создавшая
+    # матрицу через allocate, должна отпустить её раньше
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+            segment.unlink()
+        self.segments = []
+
+def attach_arrays(specs):
+    segments, arrays = [], {}
+    for name, (segment_name, shape, dtype) in specs.items():
+        segment = shared_memory.SharedMemory(name=segment_name)
+        array = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+        array.flags.writeable = False
+        segments.append(segment)
+        arrays[name] = array
+    return segments, arrays
+
+# Одна колония в рабочем процессе: свои феромоны, общие списки соседей и матрица расстояний
+def run_colony(graph: Graph, specs, pheromone, num_iterations, memory_budget, seed):
+    segments, arrays = attach_arrays(specs)
+    np.random.seed(seed)
+    aco = AntColonyOptimization(graph, pheromone=pheromone, num_iterations=num_iterations,
+                                memory_budget=memory_budget, arrays=arrays)
+    result = aco.run()
+    best_route, pheromone = aco.best_route, aco.pheromone
+    # Сегменты закрываются только после того, как колония и её представления массивов удалены
+    del aco, arrays
+    for segment in segments:
+        segment.close()
+    return result, best_route, pheromone
+
+def warm_colony(memory_budget):
+    graph = Graph(nodes=[1, 2, 3, 4], edges=[[1, 2], [2, 3], [3, 4], [1, 3]])
+    return AntColonyOptimization(graph, num_iterations=2, memory_budget=memory_budget).run() is not None
+
+# Пул процессов, где на одном графе параллельно работают независимые колонии; берётся лучший путь
+class SolverPool:
+    def __init__(self, workers=0, memory_budget=None):
+        self.workers = workers
+        self.memory_budget = memory_budget
+        self.executor = None
+
+    def start(self):
+        if self.workers > 0 and self.executor is None:
+            # Трекер общей памяти запускается до рабочих процессов, чтобы они подключились к нему, а не завели
+            # свои: иначе при выходе рабочего его трекер удалил бы сегменты, к которым тот подключался
+            resource_tracker.ensure_running()
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    # Прогрев до приёма запросов: пробное решение здесь (первые вызовы NumPy и решателя), затем запуск всех
+    # рабочих процессов - они создаются fork'ом уже с загруженными модулями и тоже решают пробный граф
+    def warm_up(self):
+        warm_colony(self.memory_budget)
+        self.start()
+        if self.executor is not None:
+            futures = [self.executor.submit(warm_colony, self.memory_budget) for _ in range(self.workers)]
+            for future in futures:
+                future.result()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    # Сломанный пул (умер рабочий процесс) не принимает задачи, поэтому заменяется новым
+    def restart(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.start()
+
+    # Колонии во всех рабочих процессах; лучший (результат, маршрут, феромоны) или None
+    def run_colonies(self, graph: Graph, specs, pheromone, num_iterations):
+        seeds = np.random.randint(2 ** 31, size=self.workers)
+        futures = [self.executor.submit(run_colony, graph, specs, pheromone, num_iterations,
+                                        self.memory_budget, int(seed)) for seed in seeds]
+        best = None
+        for future in futures:
+            result, best_route, colony_pheromone = future.result()
+            if result is not None and (best is None or result.total_distance < best[0].total_distance):
+                best = (result, best_route, colony_pheromone)
+        return best
+
+    # Возвращает результат и колонию с феромонами лучшего решения (их сохраняют для повторного решения)
+    def solve(self, graph: Graph, pheromone=None, num_iterations=50):
+        self.start()
+        if self.executor is None:
+            aco = AntColonyOptimization(graph, pheromone=pheromone, num_iterations=num_iterations,
+                                        memory_budget=self.memory_budget)
+            return aco.run(), aco
+
+        shared = SharedArrays()
+        aco = None
+        try:
+            aco = AntColonyOptimization(graph, pheromone=pheromone, num_iterations=num_iterations,
+                                        memory_budget=self.memory_budget, allocate=shared.allocate)
+            if not aco.feasible():
+                return aco.run(), aco
+            specs = shared.share(aco.shared_arrays())
+            try:
+                best = self.run_colonies(graph, specs, pheromone, num_iterations)
+            except BrokenProcessPool:
+                # Рабочий процесс умер (например, его убили при нехватке памяти): колонии запускаются ещё раз
+                # в новом пуле, а если сломался и он - решение идёт в процессе API
+                self.restart()
+                try:
+                    best = self.run_colonies(graph, specs, pheromone, num_iterations)
+                except BrokenProcessPool:
+                    self.restart()
+                    return aco.run(), aco
+        finally:
+            # Колония остаётся у вызывающего ради феромонов, а матрица расстояний в общей памяти ему не нужна
+            if aco is not None:
+                aco.distance_matrix = None
+            shared.close()
+
+        if best is None:
+            return None, aco
+        result, aco.best_route, aco.pheromone = best
+        return result, aco
+
+@lru_cache
+def get_solver_pool():
+    settings = get_settings()
+    return SolverPool(settings.SOLVER_WORKERS, settings.SOLVER_MEMORY_BUDGET)
@@ -0,0 +1,175 @@
+import argparse
+import ast
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from app.schemas.graph import Graph
+from app.services.aco import AntColonyOptimization
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REFERENCE_FILES = ("Kommivoyager_Algorithm", "KommivoyagerXCorrectOutput")
+
+# Режимы решателя: имя -> функция, создающая решатель для графа. Первый режим - эталон для сравнения.
+SOLVER_MODES = {
+    "default": lambda graph: AntColonyOptimization(graph),
+    "full-scan": lambda graph: AntColonyOptimization(graph, max_candidates=0),
+    "no-matrix": lambda graph: AntColonyOptimization(graph, memory_budget=0),
+}
+
+
+# Достаём пример из файла-образца через ast, не выполняя сам файл (он запускает перебор параметров)
+def parse_reference(path):
+    with open(path, encoding="utf-8") as file:
+        tree = ast.parse(file.read())
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or not isinstance(node.targets[0], ast.Name):
+            continue
+        name = node.targets[0].id
+        if name == "graph_data":
+            return Graph(**ast.literal_eval(node.value)["graph"])
+        if name == "distance_matrix" and isinstance(node.value, ast.Call):
+            # Веса сервис не учитывает: каждое конечное ребро матрицы становится ребром длины 1
+            matrix = np.array(ast.literal_eval(node.value.args[0]), dtype=float)
+            size = len(matrix)
+            edges = [[i + 1, j + 1] for i in range(size) for j in range(i + 1, size) if np.isfinite(matrix[i, j])]
+            return Graph(nodes=list(range(1, size + 1)), edges=edges)
+    raise ValueError(f"no instance found in {path}")
+
+
+# Случайный граф со спрятанным гамильтоновым путём и лишними рёбрами
+def planted_instance(size, extra_edges, seed):
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(size) + 1
+    edges = {tuple(sorted((int(a), int(b)))) for a, b in zip(order[:-1], order[1:])}
+    while len(edges) < size - 1 + extra_edges:
+        a, b = rng.integers(1, size + 1, 2)
+        if a != b:
+            edges.add((int(min(a, b)), int(max(a, b))))
+    labels = rng.permutation(size) * 10 + 1
+    return Graph(nodes=labels.tolist(), edges=[list(edge) for edge in sorted(edges)])
+
+
+def instances(seed=0):
+    # Ожидаемое расстояние - число узлов гамильтонова пути (так считает сервис), None - пути нет
+    result = []
+    for name in REFERENCE_FILES:
+        graph = parse_reference(os.path.join(BASE_DIR, name))
+        result.append((name, graph, float(len(graph.nodes))))
+    for size, extra in ((10, 10), (50, 100), (200, 800)):
+        result.append((f"planted-{size}", planted_instance(size, extra, seed + size), float(size)))
+    star = Graph(nodes=[1, 2, 3, 4, 5], edges=[[1, 2], [1, 3], [1, 4], [1, 5]])
+    result.append(("star-5", star, None))
+    return result
+
+
+def check_path(graph, result):
+    # Путь должен пройти каждый узел ровно один раз и только по рёбрам графа
+    if result is None:
+        return True
+    path = result.path
+    if sorted(path) != sorted(graph.nodes):
+        return False
+    label_edges = set()
+    for i, j in graph.edges:
+        a, b = graph.nodes[i - 1], graph.nodes[j - 1]
+        label_edges.add((a, b))
+        label_edges.add((b, a))
+    if any((a, b) not in label_edges for a, b in zip(path[:-1], path[1:])):
+        return False
+    return result.total_distance == len(path)
+
+
+def solve(factory, graph, seed):
+    np.random.seed(seed)
+    start = time.perf_counter()
+    result = factory(graph).run()
+    return result, time.perf_counter() - start
+
+
+def peak_memory(factory, graph, seed):
+    # Отдельный прогон: tracemalloc сильно замедляет NumPy и исказил бы время
+    np.random.seed(seed)
+    tracemalloc.start()
+    factory(graph).run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def worse(distance, baseline):
+    # Хуже эталона: эталон нашёл путь, а этот режим - нет, или нашёл более длинный
+    return baseline is not None and (distance is None or distance > baseline)
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check solver modes on the reference and generated graphs")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--modes", default=",".join(SOLVER_MODES))
+    parser.add_argument("--history", default=os.path.join(BASE_DIR, "benchmark_history.jsonl"))
+    parser.add_argument("--slowdown", type=float, default=1.5, help="warn when slower than history median by this")
+    parser.add_argument("--strict", action="store_true", help="also fail when a path misses the expected distance")
+    args = parser.parse_args()
+
+    modes = args.modes.split(",")
+    history = load_history(args.history)
+    run_at = datetime.now().isoformat(timespec="seconds")
+    records, failures = [], []
+
+    for name, graph, expected in instances(args.seed):
+        baseline = None
+        for mode in modes:
+            timings, result = [], None
+            for repeat in range(args.repeats):
+                result, elapsed = solve(SOLVER_MODES[mode], graph, args.seed + repeat)
+                timings.append(elapsed)
+            peak = peak_memory(SOLVER_MODES[mode], graph, args.seed)
+            distance = None if result is None else result.total_distance
+            valid = check_path(graph, result)
+            record = {"run_at": run_at, "instance": name, "mode": mode, "nodes": len(graph.nodes),
+                      "edges": len(graph.edges), "distance": distance, "expected": expected, "valid": valid,
+                      "seconds": statistics.median(timings), "peak_bytes": peak}
+            records.append(record)
+
+            status = "ok"
+            if not valid:
+                status = "INVALID"
+                failures.append(record)
+            elif mode != modes[0] and worse(distance, baseline):
+                status = "WORSE THAN BASELINE"
+                failures.append(record)
+            elif distance != expected:
+                status = "missed expected"
+                if args.strict:
+                    failures.append(record)
+            if mode == modes[0]:
+                baseline = distance
+
+            previous = [item["seconds"] for item in history if item["instance"] == name and item["mode"] == mode]
+            if previous and record["seconds"] > statistics.median(previous[-5:]) * args.slowdown:
+                status += ", slower than history"
+            print(f"{name:<28}{mode:<12}{str(distance):>8}{str(expected):>8}"
+                  f"{record['seconds'] * 1000:>10.1f} ms{record['peak_bytes'] / 1024:>10.0f} KiB  {status}")
+
+    with open(args.history, "a", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+    if failures:
+        raise SystemExit(f"{len(failures)} failing result(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Эти модули должны загружаться только при первом запросе к соответствующему маршруту
+LAZY_MODULES = ("numpy", "sqlalchemy", "passlib", "bcrypt", "jose")
+
+# Код дочернего процесса: импорт приложения, затем запуск lifespan (прогрев решателя) до готовности
+CHILD = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+loaded = [name for name in {lazy!r} if name in sys.modules]
+
+async def startup():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(startup())
+print(json.dumps({{"import": imported - start, "ready": ready - start, "loaded": loaded}}))
+"""
+
+
+def measure(importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", CHILD.format(lazy=LAZY_MODULES)]
+    done = subprocess.run(command, cwd=BASE_DIR, capture_output=True, text=True)
+    if done.returncode != 0:
+        raise SystemExit(done.stderr)
+    return json.loads(done.stdout.strip().splitlines()[-1]), done.stderr
+
+
+# Строки "import time: self | cumulative | name" -> самые долгие импорты верхнего уровня под main
+def slowest_imports(log, count):
+    rows = []
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how long the API takes to import and become ready")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=500)
+    parser.add_argument("--ready-budget-ms", type=float, default=800)
+    parser.add_argument("--top", type=int, default=8, help="how many of the slowest imports to list")
+    args = parser.parse_args()
+
+    runs = [measure()[0] for _ in range(args.repeats)]
+    import_ms = statistics.median(run["import"] for run in runs) * 1000
+    ready_ms = statistics.median(run["ready"] for run in runs) * 1000
+    _, log = measure(importtime=True)
+
+    print(f"import main: {import_ms:.0f} ms (budget {args.import_budget_ms:.0f} ms)")
+    print(f"ready after warm-up: {ready_ms:.0f} ms (budget {args.ready_budget_ms:.0f} ms)")
+    for cumulative, name in slowest_imports(log, args.top):
+        print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append("import is over budget")
+    if ready_ms > args.ready_budget_ms:
+        failures.append("startup is over budget")
+    if runs[0]["loaded"]:
+        failures.append(f"loaded eagerly: {', '.join(runs[0]['loaded'])}")
+    if failures:
+        raise SystemExit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,15 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.api import endpoints
 
-app = FastAPI(title="Travelling Salesman Problem API")
-app.include_router(endpoints.router)
\ No newline at end of file
+# До приёма запросов прогреваем решатель и запускаем рабочие процессы, при остановке - закрываем их
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.services.solver_pool import get_solver_pool
+    solver_pool = get_solver_pool()
+    solver_pool.warm_up()
+    yield
+    solver_pool.shutdown()
+
+app = FastAPI(title="Travelling Salesman Problem API", lifespan=lifespan)
+app.include_router(endpoints.router)